@@ -4,222 +4,16 @@ Plugin Name:    Plot Timeseries Data Live (FlightPlot)
 Tools Used:     Python 3.13.3, XPPython3 4.5.0
 """
 
-import time
+import multiprocessing
+import os
+import socket
+import subprocess
 import threading
-from queue import Queue, Empty
-from collections import deque
+import time
 from XPPython3 import xp  # type: ignore
-from PyQt5 import QtWidgets, QtCore
-import pyqtgraph as pg
-
-
-class PlotterWindow(QtWidgets.QWidget):
-    def __init__(self, dataQ, paraNames, notifyStop):
-        super().__init__()
-
-        self.dataQ = dataQ
-        self.paraNames = paraNames
-        self.notifyStop = notifyStop
-
-        self.isRunning = True
-        self.isPaused = False
-        self.isClosing = False
-
-        self.maxlen = 14400
-        self.data = {param: deque(maxlen=self.maxlen) for param in self.paraNames}
-        self.time = deque(maxlen=self.maxlen)
-
-        self.setStyleSheet("""
-            QWidget {
-                background-color: #0f1116;
-                color: #e0e0e0;
-                font-family: "Segoe UI", "Roboto", sans-serif;
-                font-size: 12pt;
-            }
-            QCheckBox {
-                spacing: 8px;
-                font-weight: 600;
-            }
-            QPushButton {
-                background-color: #2d89ef;
-                border-radius: 10px;
-                padding: 8px 14px;
-                font-size: 12pt; font-weight: 600; color: white;
-            }
-            QPushButton:hover {
-                background-color: #1b5fbf;
-            }
-        """)
-
-        main_layout = QtWidgets.QHBoxLayout(self)
-
-        self.plot_widget = pg.PlotWidget(background="#0f1116")
-        pi = self.plot_widget.getPlotItem()
-        self.plot_widget.showGrid(x=True, y=True, alpha=0.25)
-        pi.getAxis("bottom").setTextPen("#CCCCCC")
-        pi.getAxis("left").setTextPen("#CCCCCC")
-        pi.showAxis("right", False)
-
-        main_layout.addWidget(self.plot_widget, 4)
-
-        self.base_curve = self.plot_widget.plot([], [], pen=pg.mkPen((0, 0, 0, 0)))
-        self.curves = {}
-        self.viewboxes = {}
-        self.axes = {}
-
-        colors = ["#4DB6AC", "#F08913", "#DDC8E0", "#FFD54F", "#90A4AE", "#2B16E9"]
-
-        side_panel = QtWidgets.QFrame()
-        side_panel.setStyleSheet("QFrame { background-color: #181b22; border-radius: 12px; }")
-        side_layout = QtWidgets.QVBoxLayout(side_panel)
-        side_layout.setContentsMargins(15, 15, 15, 15)
-
-        title = QtWidgets.QLabel("<--- PARAMETERS --->")
-        title.setStyleSheet("font-size: 12pt; font-weight: bold; color: #ffffff;")
-        side_layout.addWidget(title)
-
-        self.checkboxes = {}
-
-        for i, param in enumerate(self.paraNames):
-            color = colors[i % len(colors)]
-
-            vb = pg.ViewBox()
-            axis = pg.AxisItem(orientation="right")
-            axis.setPen(color)
-            axis.setTextPen(color)
-            axis.setLabel(text=param, color=color)
-
-            pi.layout.addItem(axis, 2, 3 + i)
-            pi.scene().addItem(vb)
-            axis.linkToView(vb)
-            vb.setXLink(pi.vb)
-
-            curve = pg.PlotCurveItem(pen=pg.mkPen(color, width=2))
-            vb.addItem(curve)
-
-            self.curves[param] = curve
-            self.viewboxes[param] = vb
-            self.axes[param] = axis
-
-            axis.setVisible(False)
-            curve.setVisible(False)
-
-            cb = QtWidgets.QCheckBox(param)
-            cb.setStyleSheet(f"QCheckBox {{ color: {color}; font-weight: bold; }}")
-            cb.stateChanged.connect(self.UpdateSelected)
-            side_layout.addWidget(cb)
-            self.checkboxes[param] = cb
-
-        side_layout.addStretch()
-
-        btn_row = QtWidgets.QGridLayout()
-        self.pause_btn = QtWidgets.QPushButton("Pause")
-        self.reset_btn = QtWidgets.QPushButton("Reset")
-        btn_row.addWidget(self.pause_btn, 0, 0, 1, 2)
-        btn_row.addWidget(self.reset_btn, 1, 0, 1, 2)
-        side_layout.addLayout(btn_row)
-        self.pause_btn.clicked.connect(self.TogglePauseResume)
-        self.reset_btn.clicked.connect(self.ResetPlotting)
-
-        main_layout.addWidget(side_panel, 1)
-
-        self.timer = QtCore.QTimer(self)
-        self.timer.timeout.connect(self.UpdatePlot)
-        self.t0 = time.time()
-        self.timer.start(200)
-
-        pi.vb.sigResized.connect(self.UpdateViews)
-        self.UpdateViews()
-
-        first_param = self.paraNames[0]
-        self.checkboxes[first_param].setChecked(True)
-        self.UpdateSelected()
-
-    def closeEvent(self, event):
-        self.isClosing = True
-        if self.timer.isActive():
-            self.timer.stop()
-        try:
-            self.notifyStop()
-        finally:
-            super().closeEvent(event)
-
-    def UpdateViews(self):
-        pi = self.plot_widget.getPlotItem()
-        vb_main = pi.vb
-        rect = vb_main.sceneBoundingRect()
-        for vb in self.viewboxes.values():
-            vb.setGeometry(rect)
-            vb.linkedViewChanged(vb_main, vb.XAxis)
-
-    def UpdateSelected(self):
-        for p, cb in self.checkboxes.items():
-            vis = cb.isChecked()
-            self.curves[p].setVisible(vis)
-            self.axes[p].setVisible(vis)
-        self.UpdateViews()
-
-    def TogglePauseResume(self):
-        if not self.isRunning:
-            return
-        if not self.isPaused:
-            self.isPaused = True
-            self.timer.stop()
-            self.pause_btn.setText("Resume")
-        else:
-            self.isPaused = False
-            self.timer.start(200)
-            self.pause_btn.setText("Pause")
-
-    def ResetPlotting(self):
-        self.isRunning = True
-        self.isPaused = False
-        if self.timer.isActive():
-            self.timer.stop()
-        self.time.clear()
-        for p in self.paraNames:
-            self.data[p].clear()
-            self.curves[p].setData([], [])
-        self.base_curve.setData([], [])
-        self.pause_btn.setText("Pause")
-
-        self.t0 = time.time()
-        for cb in self.checkboxes.values():
-            cb.setChecked(False)
-        first_param = self.paraNames[0]
-        self.checkboxes[first_param].setChecked(True)
-        self.UpdateSelected()
-        self.timer.start(200)
-
-    def UpdatePlot(self):
-        if not self.isRunning or self.isPaused or self.isClosing:
-            return
-
-        latest = None
-        try:
-            while True:
-                latest = self.dataQ.get_nowait()
-        except Empty:
-            pass
-
-        if latest is None:
-            return
-
-        timestamp, values = latest
-        self.time.append(timestamp - self.t0)
-        for p, v in values.items():
-            self.data[p].append(v)
-
-        if len(self.time) > 0:
-            th = list(self.time)
-            self.base_curve.setData(th, [0] * len(th))
-
-            for p, cb in self.checkboxes.items():
-                if cb.isChecked() and len(self.data[p]) > 0:
-                    self.curves[p].setData(th, list(self.data[p]))
-                    self.viewboxes[p].enableAutoRange(axis=self.viewboxes[p].YAxis, enable=True)
-
-        self.UpdateViews()
+from flightplot import SampleScheduler, SimClock, SampleRing, Recorder, ParameterRegistry, ChannelSlots
+from xpcommon import DataRefSampler, StatsDataRef
+from xpcommon.profiler import Profiler
 
 
 class PythonInterface:
@@ -228,6 +22,9 @@ class PythonInterface:
         self.Sig = "plugin003.flightplot.byvyomshukla"
         self.Desc = "Plots Timeseries Data in Real-Time"
 
+        # Built-in catalogue, used while there is no flightplot.json next to
+        # the plugin. That file is re-read while plotting, so channels can be
+        # enabled and disabled without reloading the plugin.
         self.parameters = {
             "ALT": "sim/flightmodel2/position/pressure_altitude",
             "CAS": "sim/cockpit2/gauges/indicators/airspeed_kts_pilot",
@@ -235,27 +32,109 @@ class PythonInterface:
             'ROLL': 'sim/flightmodel/position/phi',
             'VSPD': 'sim/cockpit2/gauges/indicators/vvi_fpm_pilot'
         }
-        self.datarefs_pointer = {}
+
+        # Sampling rate per parameter group in Hz; 0 samples every frame.
+        # Array datarefs may be listed in self.parameters as "path[0:4]".
+        self.sampleGroups = {
+            "attitude": (25, ["PTCH", "ROLL"]),
+            "airdata": (5, ["ALT", "CAS", "VSPD"]),
+        }
+        self.configFile = "flightplot.json"
+        self.configInterval = 1.0
+        self.registry = None
+
+        # Ring columns shared by the enabled channels (one per array element).
+        self.maxColumns = 32
+        self.slots = None
+        self.channels = {}  # name -> (dataref, group, sampler)
+        self.waiting = set()  # enabled channels that did not get columns yet
+        self.scheduler = None
+        self.clock = SimClock()
+        self.timeSampler = None
+        self.record = []
+
+        # "process" runs the plot window in its own Python process so Qt
+        # rendering never competes with the sim for the GIL; "thread" runs it
+        # inside X-Plane as before (also the fallback if the launch fails).
+        self.viewerMode = "process"
+        self.viewer = None
 
         self.isPlotting = False
         self.qtThread = None
         self.qtApp = None
-        self.dataQ = Queue()
+        # Fixed-capacity ring between the flight loop and the UI; samples that
+        # do not fit are dropped and counted by the ring instead of blocking.
+        self.maxDrain = 2000
+        self.ringCapacity = 8 * self.maxDrain
+        self.ring = None
         self.window = None
-        self.stopRequested = threading.Event()
+
+        # Every plotted sample is also appended to a recording in this folder
+        # (next to the plugin); replay one with
+        # `python -m flightplot.viewer --replay FILE`. None disables recording.
+        self.recordDir = "recordings"
+        self.recorder = None
+
+        # Timing probes on the sim-side callbacks (budgets in µs), plus ring
+        # and UI figures gathered once a second. Published as a float array
+        # dataref, logged every statsLogInterval seconds and sent every
+        # statsInterval seconds to the TrajPlot server (GET /stats there).
+        # None disables logging or sending.
+        self.profiler = Profiler("FlightPlot")
+        self.loopProbe = self.profiler.probe("FlightLoopCallback", budget_us=1000)
+        self.drawProbe = self.profiler.probe("DrawCallback", budget_us=500)
+        self.profiler.count("stats_send_errors", 0)
+        for gauge in ("ring_depth", "ring_dropped", "recorder_dropped",
+                      "ui_p50_us", "ui_p99_us", "ui_max_us"):
+            self.profiler.gauge(gauge, 0)
+        self.statsDataRef = None
+        self.statsLogInterval = 60.0
+        self.statsInterval = 10.0
+        self.statsServer = ("127.0.0.1", 49005)
+        self.statsSock = None
+        self.statsLogged = self.statsSent = 0.0
+
+        # Status overlay in the sim window while plotting. Its lines are
+        # formatted once a second (UpdateOverlay) from the top-right corner
+        # worked out when the screen size changes, so a frame only draws.
+        self.overlayWidth = 300
+        self.overlayLineHeight = 14
+        self.overlay = []  # (rgb, x, y, text)
+        self.overlaySize = None
+        self.overlayOrigin = (0, 0)
+        self.overlayRows = (0, 0.0)  # ring rows written, at monotonic time
+        self.overlayFailed = False
 
     def XPluginStart(self):
         self.flightplotMenuId = xp.createMenu("FlightPlot", None, 0, self.MenuHandler, None)
         self.toggleMenuItemId = xp.appendMenuItem(self.flightplotMenuId, "Toggle: ON", 'toggle')
 
-        self.datarefs_pointer = {param: xp.findDataRef(dataref) for param, dataref in self.parameters.items()}
+        pluginDir = os.path.dirname(os.path.abspath(__file__))
+        self.registry = ParameterRegistry(
+            os.path.join(pluginDir, self.configFile),
+            {group: rate for group, (rate, params) in self.sampleGroups.items()},
+            {p: (self.parameters[p], group) for group, (rate, params) in self.sampleGroups.items() for p in params}
+        )
+        self.timeSampler = DataRefSampler([("time", "sim/time/total_running_time_sec")]).resolve()
+        try:
+            self.statsDataRef = StatsDataRef("vyomshukla/flightplot/stats", self.profiler).register()
+        except Exception as e:
+            xp.log(f"[FlightPlot] stats dataref not available ({e})")
 
         return self.Name, self.Sig, self.Desc
 
     def XPluginEnable(self): return 1
     def XPluginReceiveMessage(self, inFromWho, inMessage, inParam): pass
     def XPluginDisable(self): pass
-    def XPluginStop(self): pass
+
+    def XPluginStop(self):
+        # Quitting or reloading while plotting: flush the recording, unlink
+        # the shared ring and close the stats socket all the same
+        if self.isPlotting:
+            self.StopPlotting()
+        if self.statsDataRef is not None:
+            self.statsDataRef.unregister()
+            self.statsDataRef = None
 
     def MenuHandler(self, menuRef, itemRef):
         self.isPlotting = not self.isPlotting
@@ -267,21 +146,89 @@ class PythonInterface:
             self.StopPlotting()
 
     def StartPlotting(self):
+        self.PollConfig()
+        python = self.ViewerPython() if self.viewerMode == "process" else None
+        shared = python is not None
+        self.ring = SampleRing.Create(1 + self.maxColumns, self.ringCapacity, shared=shared)
+        self.slots = ChannelSlots(self.maxColumns)
+        self.record = [float("nan")] * self.maxColumns
+        self.channels = {}
+        self.waiting = set()
+        self.recorder = self.StartRecorder()
+        if self.statsServer:
+            self.statsSock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.statsSock.setblocking(False)
+        self.SyncChannels()
+        if not (shared and self.LaunchViewer(python)):
+            self.StartUIThread()
+        self.clock.Reset()
+        self.overlayRows = (0, 0.0)
+        self.overlayFailed = False
+        self.overlaySize = None
+        self.UpdateOverlay()
+        xp.registerFlightLoopCallback(self.FlightLoopCallback, -1, None)
+        xp.registerFlightLoopCallback(self.ConfigLoopCallback, self.configInterval, None)
+        xp.registerDrawCallback(self.DrawCallback, xp.Phase_Window, 0, 0)
+
+    def StartRecorder(self):
+        if not self.recordDir:
+            return None
+        folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), self.recordDir)
+        path = os.path.join(folder, time.strftime("flightplot-%Y%m%d-%H%M%S.fpr"))
+        try:
+            os.makedirs(folder, exist_ok=True)
+            return Recorder(path, [None] * self.maxColumns).Start()
+        except OSError as e:
+            xp.log(f"[FlightPlot] not recording, cannot write {path} ({e})")
+            return None
+
+    def StartUIThread(self):
         self.qtThread = threading.Thread(
             target=self.LaunchUI,
             name="FlightPlotQtThread",
             daemon=True
         )
         self.qtThread.start()
-        xp.registerFlightLoopCallback(self.FlightLoopCallback, 1, None)
-        xp.registerDrawCallback(self.DrawCallback, xp.Phase_Window, 0, 0)
+
+    def ViewerPython(self):
+        """The Python to run the viewer process with, or None to use the in-sim window."""
+        # Under X-Plane sys.executable is the sim itself, never a Python
+        python = getattr(xp, "pythonExecutable", None)
+        if not python:
+            xp.log("[FlightPlot] no Python executable for the viewer process, using in-sim window")
+            return None
+        # Creating shared memory on POSIX starts multiprocessing's resource
+        # tracker, which would otherwise be launched as sys.executable too
+        multiprocessing.set_executable(python)
+        return python
+
+    def LaunchViewer(self, python):
+        pluginDir = os.path.dirname(os.path.abspath(__file__))
+        args = [python, "-m", "flightplot.viewer",
+                "--ring", self.ring.name,
+                "--max-drain", str(self.maxDrain),
+                "--config", self.registry.path]
+        if self.recorder is not None:
+            args += ["--recording", self.recorder.path]
+        try:
+            self.viewer = subprocess.Popen(args, cwd=pluginDir)
+        except OSError as e:
+            xp.log(f"[FlightPlot] could not start viewer process ({e}), using in-sim window")
+            self.viewer = None
+            return False
+        return True
 
     def LaunchUI(self):
+        from PyQt5 import QtWidgets
+        from flightplot.window import PlotterWindow
+
         self.qtApp = QtWidgets.QApplication([])
         self.window = PlotterWindow(
-            self.dataQ,
-            list(self.parameters.keys()),
-            notifyStop=self.RequestStop
+            self.ring,
+            notifyStop=self.ring.MarkClosed,
+            maxDrain=self.maxDrain,
+            recording=self.recorder.path if self.recorder is not None else None,
+            config=self.registry.path
         )
         self.window.setWindowTitle("FlightPlot")
         self.window.show()
@@ -293,22 +240,40 @@ class PythonInterface:
             self.window = None
             self.qtApp = None
 
-    def RequestStop(self):
-        self.stopRequested.set()
-
     def StopPlotting(self):
-        self.stopRequested.clear()
+        if self.ring is not None:
+            self.ReportStats(final=True)
+        if self.statsSock is not None:
+            self.statsSock.close()
+            self.statsSock = None
 
-        try:
-            xp.unregisterFlightLoopCallback(self.FlightLoopCallback, None)
-        except Exception:
-            pass
+        for callback in (self.FlightLoopCallback, self.ConfigLoopCallback):
+            try:
+                xp.unregisterFlightLoopCallback(callback, None)
+            except Exception:
+                pass
         try:
             xp.unregisterDrawCallback(self.DrawCallback, xp.Phase_Window, 0, 0)
         except Exception:
             pass
 
+        if self.viewer is not None:
+            self.ring.RequestStop()
+            try:
+                self.viewer.wait(timeout=2.0)
+            except subprocess.TimeoutExpired:
+                self.viewer.terminate()
+            self.viewer = None
+
+        if self.recorder is not None:
+            self.recorder.Stop()
+            xp.log(f"[FlightPlot] recorded {self.recorder.rows} samples to {self.recorder.path}")
+            if self.recorder.Overflow():
+                xp.log(f"[FlightPlot] {self.recorder.Overflow()} samples missing from the recording, the disk fell behind")
+            self.recorder = None
+
         if self.window is not None:
+            from PyQt5 import QtCore
             try:
                 QtCore.QMetaObject.invokeMethod(
                     self.window, "close", QtCore.Qt.QueuedConnection
@@ -319,10 +284,19 @@ class PythonInterface:
                 except Exception:
                     pass
 
+        uiRunning = False
         if self.qtThread is not None and self.qtThread.is_alive():
             self.qtThread.join(timeout=2.0)
+            uiRunning = self.qtThread.is_alive()
         self.qtThread = None
 
+        if self.ring is not None:
+            if self.ring.Overflow():
+                xp.log(f"[FlightPlot] {self.ring.Overflow()} samples dropped, the plot window fell behind")
+            if self.ring.shm is not None and not uiRunning:
+                self.ring.Close(unlink=True)
+            self.ring = None
+
         if self.isPlotting:
             self.isPlotting = False
             try:
@@ -330,25 +304,165 @@ class PythonInterface:
             except Exception:
                 pass
 
-    def FlightLoopCallback(self, elapsedSinceLastCall, elapsedTimeSinceLastFlightLoop, loopCounter, refcon):
-        if self.stopRequested.is_set():
-            self.StopPlotting()
-            return 0
+    def PollConfig(self):
+        try:
+            return self.registry.Poll()
+        except ValueError as e:
+            xp.log(f"[FlightPlot] config not loaded, keeping the previous one: {e}")
+            return False
+
+    def SyncChannels(self):
+        """Bring the sampled channels and the ring layout in line with the registry."""
+        enabled = self.registry.Enabled()
+        self.waiting.intersection_update(enabled)
+        changed = False
+        for name, (dataref, group, sampler) in list(self.channels.items()):
+            if enabled.get(name) != (dataref, group):
+                self.RemoveChannel(name)
+                changed = True
+        for name, (dataref, group) in enabled.items():
+            if name not in self.channels:
+                changed |= self.AddChannel(name, dataref, group)
+        if changed:
+            self.ring.WriteLayout(self.slots.names)
+            if self.recorder is not None:
+                self.recorder.SetLayout(self.slots.names)
+
+        groups = {}
+        for dataref, group, sampler in self.channels.values():
+            groups.setdefault(group, []).append(sampler)
+        self.scheduler = SampleScheduler({
+            group: (self.registry.groups[group], samplers) for group, samplers in groups.items()
+        })
+
+    def AddChannel(self, name, dataref, group):
+        # Only enabled channels are looked up, bound and given ring columns.
+        sampler = DataRefSampler([(name, dataref)]).resolve()
+        first = self.slots.Assign(name, sampler.columns, self.ring.Consumed())
+        if first is None:
+            # Columns of a just removed channel are reused once the viewer
+            # has drained them; retried on every config poll until then.
+            if name not in self.waiting:
+                xp.log(f"[FlightPlot] no free plot columns for {name} yet")
+                self.waiting.add(name)
+            return False
+        self.waiting.discard(name)
+        sampler.bind(self.record, first)
+        self.channels[name] = (dataref, group, sampler)
+        return True
+
+    def RemoveChannel(self, name):
+        first, width = self.slots.Release(name, self.ring.Written())
+        self.record[first:first + width] = [float("nan")] * width
+        del self.channels[name]
+
+    def PollViewer(self):
+        """Fall back to the in-sim window if the viewer process died."""
+        if self.viewer is None:
+            return
+        code = self.viewer.poll()
+        if code is None:
+            return
+        self.viewer = None
+        if code != 0:
+            # A clean exit is the window being closed, which the flight loop
+            # already sees on the ring; anything else is a failed viewer
+            xp.log(f"[FlightPlot] viewer process exited with code {code}, using in-sim window")
+            self.StartUIThread()
+
+    def ConfigLoopCallback(self, elapsedSinceLastCall, elapsedTimeSinceLastFlightLoop, loopCounter, refcon):
+        self.PollViewer()
+        if self.PollConfig() or self.waiting:
+            self.SyncChannels()
+        self.ReportStats()
+        self.UpdateOverlay()
+        return self.configInterval
+
+    def ReportStats(self, final=False):
+        """Refresh the ring and UI gauges; log and send the stats when due (always if final)."""
+        profiler = self.profiler
+        profiler.gauge("ring_depth", self.ring.Depth())
+        profiler.gauge("ring_dropped", self.ring.Overflow())
+        profiler.gauge("recorder_dropped", self.recorder.Overflow() if self.recorder is not None else 0)
+        p50, p99, peak, _, _ = self.ring.UiStats()
+        profiler.gauge("ui_p50_us", p50)
+        profiler.gauge("ui_p99_us", p99)
+        profiler.gauge("ui_max_us", peak)
+
+        now = time.monotonic()
+        if self.statsLogInterval and (final or now - self.statsLogged >= self.statsLogInterval):
+            self.statsLogged = now
+            xp.log(profiler.line())
+        if self.statsSock is not None and (final or now - self.statsSent >= self.statsInterval):
+            self.statsSent = now
+            try:
+                self.statsSock.sendto(profiler.packet(), self.statsServer)
+            except OSError:
+                profiler.count("stats_send_errors")
 
-        values = {p: xp.getDataf(dref) for p, dref in self.datarefs_pointer.items()}
-        self.dataQ.put((time.time(), values))
-        return 1
+    def FlightLoopCallback(self, elapsedSinceLastCall, elapsedTimeSinceLastFlightLoop, loopCounter, refcon):
+        with self.loopProbe:
+            if self.ring.Closed():
+                self.StopPlotting()
+                return 0
+
+            now = self.clock.Stamp(self.timeSampler.sample()[0], elapsedSinceLastCall)
+            due = self.scheduler.Due(now)
+            if due:
+                # Groups that are not due keep their last value (sample and hold).
+                for samplers in due:
+                    for sampler in samplers:
+                        sampler.sample()
+                self.ring.Write(now, self.record)
+                if self.recorder is not None:
+                    self.recorder.Write(now, self.record)
+            return self.scheduler.NextInterval(now)
+
+    def UpdateOverlay(self):
+        """Format the overlay lines: sample rate, ring fill and UI refresh time."""
+        try:
+            size = xp.getScreenSize()
+            if size != self.overlaySize:
+                self.overlaySize = size
+                self.overlayOrigin = (size[0] - self.overlayWidth, size[1] - 20)
+
+            now = time.monotonic()
+            written = self.ring.Written()
+            rows, since = self.overlayRows
+            rate = (written - rows) / (now - since) if since and now > since else 0.0
+            self.overlayRows = (written, now)
+            depth = self.ring.Depth()
+            _, p99, _, count, last = self.ring.UiStats()
+            dropped = self.ring.Overflow()
+
+            white, amber, red = (1.0, 1.0, 1.0), (1.0, 0.75, 0.0), (1.0, 0.0, 0.0)
+            fill = depth / self.ringCapacity
+            lines = [
+                (red, "PLOTTING TIMESERIES DATA ..."),
+                (amber if fill > 0.5 else white,
+                 f"{rate:.0f} samples/s   queue {depth} ({fill:.0%} full)"),
+                (white, f"UI refresh {last / 1000:.1f} ms   p99 {p99 / 1000:.1f} ms") if count
+                else (amber, "UI not refreshing"),
+            ]
+            if dropped:
+                lines.append((red, f"{dropped} samples dropped"))
+            x, y = self.overlayOrigin
+            self.overlay = [(rgb, x, y - i * self.overlayLineHeight, text)
+                            for i, (rgb, text) in enumerate(lines)]
+        except Exception as e:
+            self.OverlayFailed(e)
+
+    def OverlayFailed(self, e):
+        # Logged once per plotting session; the overlay is cosmetic
+        if not self.overlayFailed:
+            self.overlayFailed = True
+            xp.log(f"[FlightPlot] overlay error: {e!r}")
 
     def DrawCallback(self, inPhase, inAfter, inRefCon):
-        try:
-            screen_width, screen_height = xp.getScreenSize()
-            xp.drawString(
-                rgb=(1.0, 0.0, 0.0),
-                x=screen_width - 200,
-                y=screen_height - 20,
-                value="PLOTTING TIMESERIES DATA ...",
-                fontID=xp.Font_Proportional
-            )
-        except Exception:
-            pass
+        with self.drawProbe:
+            try:
+                for rgb, x, y, text in self.overlay:
+                    xp.drawString(rgb=rgb, x=x, y=y, value=text, fontID=xp.Font_Proportional)
+            except Exception as e:
+                self.OverlayFailed(e)
         return 1
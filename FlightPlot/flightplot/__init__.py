@@ -0,0 +1,15 @@
+"""
+Support package for the FlightPlot plugin (PI_FlightPlot.py).
+Copy this folder next to PI_FlightPlot.py in Resources/plugins/PythonPlugins.
+
+The Qt plot window lives in flightplot.window and is imported only where it
+runs (the viewer process or the in-sim UI thread), never by the plugin itself.
+"""
+
+from .ringbuffer import RingBuffer
+from .lod import MinMaxPyramid
+from .ranges import SlidingExtremes
+from .scheduler import SampleScheduler, SimClock
+from .transport import SampleRing
+from .recorder import Recorder, Recording
+from .registry import ParameterRegistry, ChannelSlots
@@ -0,0 +1,195 @@
+"""
+Derived FlightPlot channels: arithmetic expressions and causal filters over
+the sampled channels, evaluated one sample at a time.
+
+    "derived": {
+      "CAS_S": "ema(CAS, 2)",
+      "GAMMA": "deg(atan2(VSPD / 60, CAS * 1.68781))",
+      "NZ":    "1 + ema(deriv(VSPD / 60), 0.5) / 32.174",
+      "N1_AVG": "(N1[0] + N1[1]) / 2"
+    }
+
+Expressions use + - * / ** %, numbers, channel names (array elements as
+N1[0]; earlier derived channels too) and the functions below. They are
+parsed with ast and compiled into closures; nothing is passed to eval().
+"""
+
+import ast
+import math
+from collections import deque
+
+NaN = float("nan")
+
+FUNCTIONS = {
+    "abs": abs, "min": min, "max": max,
+    "sqrt": math.sqrt, "exp": math.exp, "log": math.log, "hypot": math.hypot,
+    "sin": math.sin, "cos": math.cos, "tan": math.tan,
+    "asin": math.asin, "acos": math.acos, "atan": math.atan, "atan2": math.atan2,
+    "deg": math.degrees, "rad": math.radians,
+}
+# (fewest, most) arguments, None = any number; the rest take exactly one
+ARITY = {"min": (2, None), "max": (2, None), "hypot": (1, None), "log": (1, 2), "atan2": (2, 2)}
+
+_BINARY = {
+    ast.Add: lambda a, b: a + b,
+    ast.Sub: lambda a, b: a - b,
+    ast.Mult: lambda a, b: a * b,
+    ast.Div: lambda a, b: a / b,
+    ast.Pow: lambda a, b: a ** b,
+    ast.Mod: lambda a, b: a % b,
+}
+
+
+class Ema:
+    """ema(x, tau): exponential moving average with a time constant of tau seconds."""
+
+    def __init__(self, tau):
+        self.tau = float(tau)
+        self.Reset()
+
+    def Reset(self):
+        self.value = NaN
+        self.t = None
+
+    def Step(self, t, x):
+        if x != x:
+            return self.value
+        if self.t is None:
+            self.value = x
+        elif t > self.t:
+            self.value += (1.0 - math.exp((self.t - t) / self.tau)) * (x - self.value)
+        self.t = t
+        return self.value
+
+
+class MovingAverage:
+    """ma(x, n): mean of the last n samples (running sum, resummed every n steps)."""
+
+    def __init__(self, n):
+        self.n = max(int(n), 1)
+        self.Reset()
+
+    def Reset(self):
+        self.window = deque()
+        self.total = 0.0
+        self.steps = 0
+
+    def Step(self, t, x):
+        window = self.window
+        if x == x:
+            window.append(x)
+            self.total += x
+            if len(window) > self.n:
+                self.total -= window.popleft()
+            self.steps += 1
+            if self.steps >= self.n:
+                # Bound the rounding drift of the running sum.
+                self.total = math.fsum(window)
+                self.steps = 0
+        return self.total / len(window) if window else NaN
+
+
+class Derivative:
+    """deriv(x): rate of change per second between consecutive samples."""
+
+    def __init__(self):
+        self.Reset()
+
+    def Reset(self):
+        self.t = None
+        self.x = NaN
+
+    def Step(self, t, x):
+        if x != x:
+            return NaN
+        rate = (x - self.x) / (t - self.t) if self.t is not None and t > self.t else NaN
+        self.t, self.x = t, x
+        return rate
+
+
+FILTERS = {"ema": Ema, "ma": MovingAverage, "deriv": Derivative}
+
+
+class DerivedChannel:
+    """
+    One compiled expression. Step(t, values) evaluates it for the sample at
+    time t, `values` mapping channel names to their current values; every
+    filter keeps its own state, so each step costs O(1). Math errors
+    (division by zero, domain errors, bad operand types) give NaN for that
+    sample.
+    """
+
+    def __init__(self, name, expression):
+        self.name = name
+        self.expression = expression
+        self.inputs = set()
+        self.filters = []
+        try:
+            tree = ast.parse(expression, mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"{name}: {e.msg}") from None
+        self.evaluate = self._Compile(tree.body)
+
+    def Reset(self):
+        for f in self.filters:
+            f.Reset()
+
+    def Step(self, t, values):
+        try:
+            return float(self.evaluate(t, values))
+        except (ArithmeticError, ValueError, TypeError):
+            return NaN
+
+    def _Compile(self, node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            value = float(node.value)
+            return lambda t, v: value
+
+        if isinstance(node, ast.Name) or (isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name)):
+            key = self._ChannelName(node)
+            self.inputs.add(key)
+            return lambda t, v: v.get(key, NaN)
+
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            operand = self._Compile(node.operand)
+            if isinstance(node.op, ast.USub):
+                return lambda t, v: -operand(t, v)
+            return operand
+
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+            op = _BINARY[type(node.op)]
+            left, right = self._Compile(node.left), self._Compile(node.right)
+            return lambda t, v: op(left(t, v), right(t, v))
+
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            func = node.func.id
+            if func in FUNCTIONS:
+                f = FUNCTIONS[func]
+                fewest, most = ARITY.get(func, (1, 1))
+                if len(node.args) < fewest or most is not None and len(node.args) > most:
+                    raise ValueError(f"{self.name}: wrong number of arguments to {func}()")
+                args = [self._Compile(a) for a in node.args]
+                return lambda t, v: f(*[a(t, v) for a in args])
+            if func in FILTERS:
+                if not node.args:
+                    raise ValueError(f"{self.name}: {func}() needs a channel expression")
+                # Filter parameters (tau, n) must be plain numbers.
+                try:
+                    params = [ast.literal_eval(a) for a in node.args[1:]]
+                    state = FILTERS[func](*params)
+                except (ValueError, TypeError):
+                    raise ValueError(f"{self.name}: bad arguments to {func}()") from None
+                self.filters.append(state)
+                arg = self._Compile(node.args[0])
+                return lambda t, v: state.Step(t, arg(t, v))
+            raise ValueError(f"{self.name}: unknown function {func}()")
+
+        raise ValueError(f"{self.name}: unsupported expression {ast.dump(node)[:40]}")
+
+    def _ChannelName(self, node):
+        if isinstance(node, ast.Name):
+            return node.id
+        index = node.slice
+        if isinstance(index, ast.Constant) and isinstance(index.value, int):
+            return f"{node.value.id}[{index.value}]"
+        raise ValueError(f"{self.name}: channel index must be a number")
@@ -0,0 +1,43 @@
+"""
+Export of FlightPlot recordings to CSV or the columnar .colz format.
+
+    python -m flightplot.export recordings/flightplot-20250101-120000.fpr out.csv
+
+The recording is read through mmap one chunk at a time, so exports of long
+sessions use bounded memory. The plot window's Export button runs the same
+code on a worker thread.
+"""
+
+import argparse
+import sys
+
+from xpcommon.export import CHUNK_ROWS, export
+
+from .recorder import Recording
+
+
+def ExportRecording(path, out, fmt=None, rows=CHUNK_ROWS):
+    """Write every sample of a recording to `out`; returns the row count."""
+    recording = Recording(path, speed=0)
+    try:
+        chunks = (list(recording.Rows(start, start + rows).T)
+                  for start in range(0, len(recording), rows))
+        return export(out, recording.columns, chunks, fmt)
+    finally:
+        recording.Close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a FlightPlot recording")
+    parser.add_argument("recording")
+    parser.add_argument("out", help="output file, .csv or .colz")
+    parser.add_argument("--format", choices=("csv", "colz"), help="override the format implied by `out`")
+    args = parser.parse_args(argv)
+
+    rows = ExportRecording(args.recording, args.out, args.format)
+    print(f"{rows} samples written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
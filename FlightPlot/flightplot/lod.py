@@ -0,0 +1,136 @@
+"""
+Min/max level-of-detail pyramid over a RingBuffer.
+"""
+
+import numpy as np
+
+from .ringbuffer import RingBuffer
+
+
+class MinMaxPyramid:
+    """
+    Precomputed min/max envelopes of the series in a RingBuffer.
+
+    Level i groups `factor ** i` raw samples into one block that keeps the
+    first/last time stamp and the min/max of every series. A redraw picks the
+    coarsest level that still has at least one block per screen pixel and
+    plots each block as a vertical min->max stroke, so the number of points
+    drawn tracks the viewport width instead of the buffer length and no peak
+    is ever averaged away.
+
+    Levels are filled incrementally from the next finer level by Update(),
+    which must be called after every append to the raw buffer.
+    """
+
+    def __init__(self, buffer, timeKey, names, factor=4):
+        self.buffer = buffer
+        self.timeKey = timeKey
+        self.names = list(names)
+        self.factor = int(factor)
+
+        columns = ["t0", "t1"]
+        for name in self.names:
+            columns += [f"min:{name}", f"max:{name}"]
+
+        self.levels = [None]  # level 0 is the raw buffer
+        self.consumed = [0]
+        size = self.factor
+        while size <= buffer.capacity:
+            self.levels.append(RingBuffer(columns, buffer.capacity // size + 2))
+            self.consumed.append(0)
+            size *= self.factor
+
+    def Clear(self):
+        for level in self.levels[1:]:
+            level.Clear()
+        self.consumed = [0] * len(self.levels)
+
+    def Update(self):
+        f = self.factor
+        for i in range(1, len(self.levels)):
+            src = self.buffer if i == 1 else self.levels[i - 1]
+            pending = src.total - self.consumed[i]
+            if pending > src.count:
+                # The source ring wrapped past data this level never saw.
+                self.consumed[i] = src.total - src.count
+                pending = src.count
+            k = pending // f
+            if k == 0:
+                break
+
+            start = src.count - pending
+            stop = start + k * f
+            t0, t1, lo, hi = self._Read(i - 1, start, stop)
+
+            rows = np.empty((k, 2 + 2 * len(self.names)), dtype=np.float64)
+            rows[:, 0] = t0.reshape(k, f)[:, 0]
+            rows[:, 1] = t1.reshape(k, f)[:, -1]
+            for j, name in enumerate(self.names):
+                # fmin/fmax skip NaN gaps; a block is NaN only if all of it is
+                rows[:, 2 + 2 * j] = np.fmin.reduce(lo[name].reshape(k, f), axis=1)
+                rows[:, 3 + 2 * j] = np.fmax.reduce(hi[name].reshape(k, f), axis=1)
+
+            self.levels[i].Extend(rows)
+            self.consumed[i] += k * f
+
+    def Select(self, x0, x1, pixels):
+        """
+        Pick the segments to draw for the time range [x0, x1] on a viewport
+        `pixels` wide. Returns a list of (level, start, stop) index ranges,
+        oldest first: the chosen level, then the still-unaggregated tail of
+        every finer level down to the raw samples.
+        """
+        pixels = max(int(pixels), 1)
+        start, stop = self.buffer.Window(x0, x1, self.timeKey)
+        n = stop - start
+
+        level = 0
+        size = self.factor
+        while level + 1 < len(self.levels) and n // size >= pixels:
+            level += 1
+            size *= self.factor
+        if level == 0:
+            return [(0, start, stop)]
+
+        segments = [(level,) + self._Window(level, x0, x1)]
+        for i in range(level, 0, -1):
+            src = self.buffer if i == 1 else self.levels[i - 1]
+            tail = src.count - (src.total - self.consumed[i])
+            ws, we = self._Window(i - 1, x0, x1)
+            s, e = max(tail, ws), min(src.count, we)
+            if e > s:
+                segments.append((i - 1, s, e))
+        return segments
+
+    def Time(self, segments):
+        if len(segments) == 1 and segments[0][0] == 0:
+            return self.buffer.Column(self.timeKey, segments[0][1], segments[0][2])
+        return np.concatenate([self._Points(i, s, e, "t0", "t1", self.timeKey)
+                               for i, s, e in segments])
+
+    def Values(self, segments, name):
+        if len(segments) == 1 and segments[0][0] == 0:
+            return self.buffer.Column(name, segments[0][1], segments[0][2])
+        return np.concatenate([self._Points(i, s, e, f"min:{name}", f"max:{name}", name)
+                               for i, s, e in segments])
+
+    def _Points(self, i, s, e, first, second, raw):
+        if i == 0:
+            return self.buffer.Column(raw, s, e)
+        level = self.levels[i]
+        return np.column_stack((level.Column(first, s, e), level.Column(second, s, e))).ravel()
+
+    def _Window(self, i, x0, x1):
+        if i == 0:
+            return self.buffer.Window(x0, x1, self.timeKey)
+        return self.levels[i].Window(x0, x1, "t0")
+
+    def _Read(self, i, start, stop):
+        if i == 0:
+            t = self.buffer.Column(self.timeKey, start, stop)
+            values = {name: self.buffer.Column(name, start, stop) for name in self.names}
+            return t, t, values, values
+        level = self.levels[i]
+        return (level.Column("t0", start, stop), level.Column("t1", start, stop),
+                {name: level.Column(f"min:{name}", start, stop) for name in self.names},
+                {name: level.Column(f"max:{name}", start, stop) for name in self.names})
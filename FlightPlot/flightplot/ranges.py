@@ -0,0 +1,48 @@
+"""
+Incremental Y-range tracking for the PlotterWindow channels.
+"""
+
+from collections import deque
+
+
+class SlidingExtremes:
+    """
+    Min/max of a series over a sliding time window.
+
+    Two monotonic deques of (time, value) pairs are kept: `lo` increasing and
+    `hi` decreasing in value, so the window extremes are always at the front.
+    Each sample is pushed and evicted at most once, i.e. O(1) amortized per
+    sample instead of a rescan of the whole series on every redraw.
+    """
+
+    def __init__(self):
+        self.lo = deque()
+        self.hi = deque()
+
+    def Clear(self):
+        self.lo.clear()
+        self.hi.clear()
+
+    def Push(self, times, values):
+        lo, hi = self.lo, self.hi
+        for t, v in zip(times, values):
+            if v != v:  # NaN
+                continue
+            while lo and lo[-1][1] >= v:
+                lo.pop()
+            lo.append((t, v))
+            while hi and hi[-1][1] <= v:
+                hi.pop()
+            hi.append((t, v))
+
+    def Evict(self, tStart):
+        lo, hi = self.lo, self.hi
+        while lo and lo[0][0] < tStart:
+            lo.popleft()
+        while hi and hi[0][0] < tStart:
+            hi.popleft()
+
+    def Bounds(self):
+        if not self.lo:
+            return None
+        return self.lo[0][1], self.hi[0][1]
@@ -0,0 +1,264 @@
+"""
+Append-only binary flight recordings for FlightPlot, and their replay.
+
+File layout (little endian, every section 8-byte aligned):
+
+    header  "FPREC" + version byte + 2 pad, uint32 columns, uint32 name bytes,
+            column names as a JSON list, zero padded to 8 bytes
+    block   "BLK\\0", uint32 rows, uint64 reserved,
+            then each column as `rows` contiguous float64 values
+    layout  "LAY\\0", uint32 name bytes, uint64 reserved, then the column
+            names (null for unused columns) of the blocks that follow
+    block   ...
+
+Blocks are only ever appended, so a recording cut short by a crash loses at
+most its last, partially written block.
+"""
+
+import json
+import mmap
+import struct
+import threading
+import time
+
+import numpy as np
+
+from collections import deque
+
+from .transport import SampleRing
+
+MAGIC = b"FPREC"
+VERSION = 1
+HEADER = struct.Struct("<5sB2xII")
+BLOCK = struct.Struct("<4sIQ")
+BLOCK_MAGIC = b"BLK\0"
+LAYOUT_MAGIC = b"LAY\0"
+
+
+def _pad8(n):
+    return -n % 8
+
+
+def _names(names):
+    data = json.dumps(list(names)).encode("utf-8")
+    return data + bytes(_pad8(len(data))), len(data)
+
+
+class Recorder:
+    """
+    Records every row the flight loop produces to a recording file.
+
+    Write() only stores the row into a private SampleRing, so the flight
+    loop never touches the disk; a writer thread drains the ring every
+    `interval` seconds and appends it as one columnar block. Rows that do
+    not fit the ring are dropped and counted, like the plot ring.
+
+    SetLayout() renames the data columns from the next written row on; the
+    writer thread splits its blocks there and records the new names.
+    """
+
+    def __init__(self, path, columns, capacity=16000, interval=0.5):
+        self.path = path
+        self.columns = ["time"] + list(columns)
+        self.capacity = capacity
+        self.interval = interval
+        self.ring = SampleRing.Create(len(self.columns), capacity)
+        self.rows = 0
+        self.layouts = deque()  # (row number, column names) not yet written
+        self.stopEvent = threading.Event()
+        self.thread = None
+
+        names, size = _names(self.columns)
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, len(self.columns), size))
+        self.file.write(names)
+        self.file.flush()
+
+    def Start(self):
+        self.thread = threading.Thread(target=self.Run, name="FlightPlotRecorder", daemon=True)
+        self.thread.start()
+        return self
+
+    def Write(self, t, record):
+        return self.ring.Write(t, record)
+
+    def SetLayout(self, names):
+        self.layouts.append((self.ring.Written(), list(names)))
+
+    def Run(self):
+        try:
+            while not self.stopEvent.wait(self.interval):
+                self.Flush()
+            self.Flush()
+        finally:
+            self.file.close()
+
+    def Flush(self):
+        rows = self.ring.Read(self.capacity)
+        start, end = self.rows, self.rows + len(rows)
+        layouts = self.layouts
+        while layouts and layouts[0][0] <= end:
+            at, names = layouts.popleft()
+            self.WriteBlock(rows[start - self.rows:at - self.rows])
+            data, size = _names(["time"] + names)
+            self.file.write(BLOCK.pack(LAYOUT_MAGIC, size, 0))
+            self.file.write(data)
+            start = at
+        self.WriteBlock(rows[start - self.rows:])
+        self.file.flush()
+        self.rows = end
+
+    def WriteBlock(self, rows):
+        if len(rows) == 0:
+            return
+        self.file.write(BLOCK.pack(BLOCK_MAGIC, len(rows), 0))
+        # Column-major: each channel of the block is one contiguous run
+        self.file.write(np.ascontiguousarray(rows.T).tobytes())
+
+    def Overflow(self):
+        return self.ring.Overflow()
+
+    def Stop(self):
+        self.stopEvent.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5.0)
+            self.thread = None
+        else:
+            self.Flush()
+            self.file.close()
+
+
+class Recording:
+    """
+    Read-only view of a recording through mmap.
+
+    Opening scans only the block headers; sample data is paged in by the OS
+    as it is read, so multi-hour recordings cost no memory up front.
+    Read(maxRows) has the same contract as SampleRing.Read, which lets a
+    PlotterWindow replay a recording in place of the live ring: rows are
+    released as fast as recorded times `speed` (0 = as fast as drained).
+
+    `columns` holds every channel that appears anywhere in the recording;
+    rows of blocks recorded while a channel was not enabled read as NaN.
+    """
+
+    def __init__(self, path, speed=1.0, clock=None):
+        self.clock = clock or time.monotonic
+        self.speed = speed
+        self.file = open(path, "rb")
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, ncols, nameBytes = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.Close()
+            raise ValueError(f"{path} is not a FlightPlot recording")
+        offset = HEADER.size
+        names = self._Names(offset, nameBytes)
+        offset += nameBytes + _pad8(nameBytes)
+
+        # One (ncols, rows) float64 view per block, the row it starts at and
+        # the (source, destination) column pairs of its layout
+        self.columns = ["time"]
+        self.blocks = []
+        self.starts = []
+        self.mappings = []
+        mapping = self._Mapping(names)
+        self.rows = 0
+        size = len(self.mm)
+        while offset + BLOCK.size <= size:
+            tag, n, _ = BLOCK.unpack_from(self.mm, offset)
+            if tag == LAYOUT_MAGIC:
+                end = offset + BLOCK.size + n + _pad8(n)
+                if end > size:
+                    break
+                mapping = self._Mapping(self._Names(offset + BLOCK.size, n))
+                offset = end
+                continue
+            end = offset + BLOCK.size + 8 * ncols * n
+            if tag != BLOCK_MAGIC or end > size:
+                break  # torn tail of a recording that was not closed cleanly
+            data = np.frombuffer(self.mm, dtype=np.float64, count=ncols * n,
+                                 offset=offset + BLOCK.size).reshape(ncols, n)
+            self.blocks.append(data)
+            self.starts.append(self.rows)
+            self.mappings.append(mapping)
+            self.rows += n
+            offset = end
+
+        self.position = 0
+        self.started = None
+
+    def __len__(self):
+        return self.rows
+
+    def _Names(self, offset, size):
+        return json.loads(bytes(self.mm[offset:offset + size]).decode("utf-8"))
+
+    def _Mapping(self, names):
+        mapping = []
+        for src, name in enumerate(names):
+            if name is None:
+                continue
+            if name not in self.columns:
+                self.columns.append(name)
+            mapping.append((src, self.columns.index(name)))
+        return mapping
+
+    def Rows(self, start, stop):
+        """Rows [start, stop) as an (n, columns) array."""
+        start, stop = max(start, 0), min(stop, self.rows)
+        if stop <= start:
+            return np.empty((0, len(self.columns)))
+        out = np.full((stop - start, len(self.columns)), np.nan)
+        i = np.searchsorted(self.starts, start, side="right") - 1
+        row = 0
+        while start < stop:
+            block = self.blocks[i]
+            lo = start - self.starts[i]
+            hi = min(block.shape[1], stop - self.starts[i])
+            for src, dst in self.mappings[i]:
+                out[row:row + hi - lo, dst] = block[src, lo:hi]
+            row += hi - lo
+            start += hi - lo
+            i += 1
+        return out
+
+    def Duration(self):
+        if not self.rows:
+            return 0.0
+        return float(self.blocks[-1][0, -1] - self.blocks[0][0, 0])
+
+    def Seek(self, seconds):
+        """Continue replay from `seconds` after the start of the recording."""
+        if not self.rows:
+            return
+        target = self.blocks[0][0, 0] + seconds
+        # Block first times narrow it down, then one block is searched.
+        firsts = [block[0, 0] for block in self.blocks]
+        i = max(int(np.searchsorted(firsts, target, side="right")) - 1, 0)
+        self.position = self.starts[i] + int(np.searchsorted(self.blocks[i][0], target))
+        self.started = None
+
+    def ReadLayout(self, known=None):
+        """Same contract as SampleRing.ReadLayout; a recording has one fixed layout."""
+        return None if known == 1 else (1, self.columns[1:])
+
+    def WriteUiStats(self, stats):
+        """Same contract as SampleRing.WriteUiStats; a replay has no producer to read them."""
+
+    def Read(self, maxRows):
+        rows = self.Rows(self.position, self.position + maxRows)
+        if len(rows) and self.speed > 0:
+            now = self.clock()
+            if self.started is None:
+                self.started = (now, rows[0, 0])
+            wall, t0 = self.started
+            due = t0 + (now - wall) * self.speed
+            rows = rows[:np.searchsorted(rows[:, 0], due, side="right")]
+        self.position += len(rows)
+        return rows
+
+    def Close(self):
+        self.blocks = []
+        self.mm.close()
+        self.file.close()
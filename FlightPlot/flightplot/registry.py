@@ -0,0 +1,140 @@
+"""
+Config-file parameter catalogue for FlightPlot, and the assignment of the
+enabled channels to sample ring columns.
+"""
+
+import json
+import os
+
+
+class ParameterRegistry:
+    """
+    Catalogue of candidate datarefs, read from a JSON file such as
+
+        {
+          "groups": {"attitude": 25, "airdata": 5},
+          "parameters": {
+            "PTCH": {"dataref": "sim/flightmodel/position/theta", "group": "attitude"},
+            "N1":   {"dataref": "sim/flightmodel/engine/ENGN_N1_[0:2]",
+                     "group": "airdata", "enabled": false}
+          },
+          "derived": {"CAS_S": "ema(CAS, 2)"}
+        }
+
+    Group rates are in Hz (0 = every frame); parameters are enabled unless
+    they say otherwise. Only enabled parameters are ever looked up and
+    sampled, so the catalogue may list hundreds of datarefs. "derived"
+    channels (flightplot.derived) are computed by the plot window, which
+    polls its own registry on the same file. Without a file the defaults
+    passed in are used. Poll() re-reads the file whenever its modification
+    time changes.
+    """
+
+    def __init__(self, path, groups, parameters):
+        self.path = path
+        self.defaultGroups = dict(groups)
+        self.defaultParameters = {
+            name: {"dataref": dataref, "group": group} for name, (dataref, group) in parameters.items()
+        }
+        self.groups = {}
+        self.parameters = {}
+        self.derived = {}
+        self.mtime = None
+        self.Apply({"groups": self.defaultGroups, "parameters": self.defaultParameters})
+
+    def Poll(self):
+        """
+        Reload the file if it changed; returns True if the catalogue did.
+        Raises ValueError for a malformed file, keeping the previous catalogue.
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self.mtime:
+            return False
+        self.mtime = mtime
+        if mtime is None:
+            config = {"groups": self.defaultGroups, "parameters": self.defaultParameters}
+        else:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    config = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                raise ValueError(f"{self.path}: {e}") from None
+        return self.Apply(config)
+
+    def Apply(self, config):
+        """Take a parsed config; raises ValueError naming the offending key if it is malformed."""
+        if not isinstance(config, dict):
+            raise ValueError("the config must be a JSON object")
+        for section in ("groups", "parameters", "derived"):
+            if not isinstance(config.get(section, {}), dict):
+                raise ValueError(f"\"{section}\" must be an object")
+        groups = {}
+        for name, rate in config.get("groups", {}).items():
+            if isinstance(rate, bool) or not isinstance(rate, (int, float)) or not 0 <= rate < float("inf"):
+                raise ValueError(f"group {name}: the rate must be a number of Hz (0 = every frame)")
+            groups[str(name)] = float(rate)
+        parameters = {}
+        for name, entry in config.get("parameters", {}).items():
+            if not isinstance(entry, dict) or not isinstance(entry.get("dataref"), str):
+                raise ValueError(f"parameter {name}: needs a \"dataref\"")
+            group = entry.get("group", next(iter(groups), "default"))
+            if not isinstance(group, str):
+                raise ValueError(f"parameter {name}: \"group\" must be a name")
+            enabled = entry.get("enabled", True)
+            if not isinstance(enabled, bool):
+                raise ValueError(f"parameter {name}: \"enabled\" must be true or false")
+            groups.setdefault(group, 0.0)
+            parameters[name] = (entry["dataref"], group, enabled)
+        derived = {}
+        for name, expression in config.get("derived", {}).items():
+            if not isinstance(expression, str):
+                raise ValueError(f"derived channel {name}: the expression must be a string")
+            derived[str(name)] = expression
+        changed = (groups, parameters, derived) != (self.groups, self.parameters, self.derived)
+        self.groups, self.parameters, self.derived = groups, parameters, derived
+        return changed
+
+    def Enabled(self):
+        """{name: (dataref, group)} of the parameters to sample."""
+        return {name: (dataref, group)
+                for name, (dataref, group, enabled) in self.parameters.items() if enabled}
+
+
+class ChannelSlots:
+    """
+    Which channel occupies each data column of a SampleRing.
+
+    A channel takes adjacent columns, one per sampled value (array datarefs
+    expand to one per element). A column freed by Release() is handed out
+    again only once the consumer has read every row written before the
+    release, so a reader that knows the current layout never attributes a
+    row to the wrong channel.
+    """
+
+    def __init__(self, count):
+        self.names = [None] * count   # column name per ring column, None if free
+        self.freedAt = [0] * count    # ring write count when the column was freed
+        self.channels = {}            # channel -> (first column, column names)
+
+    def Assign(self, channel, columns, consumed):
+        """First column given to `columns`, or None if no run of free columns is ready."""
+        width = len(columns)
+        run = 0
+        for i, name in enumerate(self.names):
+            run = run + 1 if name is None and self.freedAt[i] <= consumed else 0
+            if run == width:
+                first = i - width + 1
+                self.names[first:i + 1] = columns
+                self.channels[channel] = (first, list(columns))
+                return first
+        return None
+
+    def Release(self, channel, written):
+        first, columns = self.channels.pop(channel)
+        for i in range(first, first + len(columns)):
+            self.names[i] = None
+            self.freedAt[i] = written
+        return first, len(columns)
@@ -0,0 +1,85 @@
+"""
+Preallocated float64 ring buffer backing the PlotterWindow series.
+"""
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Column-major ring of float64 samples, one row per column name.
+
+    Every sample is written twice, at `head` and at `head + capacity`, so the
+    newest `count` samples of a column are always a single contiguous slice.
+    Column() returns that slice as a view, which pyqtgraph can plot without
+    any copy or list conversion. `total` counts every sample appended since
+    the last Clear(), including the ones that have since been overwritten.
+    """
+
+    def __init__(self, columns, capacity):
+        self.columns = list(columns)
+        self.index = {name: i for i, name in enumerate(self.columns)}
+        self.capacity = int(capacity)
+        self.buf = np.zeros((len(self.columns), 2 * self.capacity), dtype=np.float64)
+        self.head = 0
+        self.count = 0
+        self.total = 0
+
+    def __len__(self):
+        return self.count
+
+    def Clear(self):
+        self.head = 0
+        self.count = 0
+        self.total = 0
+
+    def Append(self, row):
+        h = self.head
+        self.buf[:, h] = row
+        self.buf[:, h + self.capacity] = row
+        self.head = (h + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+        self.total += 1
+
+    def Extend(self, rows):
+        """Append an (n, ncolumns) block of samples in one vectorized step."""
+        block = np.asarray(rows, dtype=np.float64).reshape(-1, len(self.columns)).T
+        n = block.shape[1]
+        if n == 0:
+            return
+        self.total += n
+        if n > self.capacity:
+            block = block[:, n - self.capacity:]
+            n = self.capacity
+
+        h = self.head
+        cap = self.capacity
+        first = min(n, cap - h)
+        self.buf[:, h:h + first] = block[:, :first]
+        self.buf[:, h + cap:h + cap + first] = block[:, :first]
+        rest = n - first
+        if rest:
+            self.buf[:, :rest] = block[:, first:]
+            self.buf[:, cap:cap + rest] = block[:, first:]
+
+        self.head = (h + n) % cap
+        self.count = min(self.count + n, cap)
+
+    def Column(self, name, start=0, stop=None):
+        """View of samples [start, stop) of `name`, oldest sample at index 0."""
+        end = self.head + self.capacity
+        base = end - self.count
+        stop = self.count if stop is None else stop
+        return self.buf[self.index[name], base + start:base + stop]
+
+    def Window(self, x0, x1, key):
+        """
+        Index range of the samples whose `key` value lies in [x0, x1], padded
+        by one sample on each side so lines run off the edge of the view.
+        `key` must be monotonic (the time column).
+        """
+        keys = self.Column(key)
+        start = max(int(np.searchsorted(keys, x0, side="left")) - 1, 0)
+        stop = min(int(np.searchsorted(keys, x1, side="right")) + 1, self.count)
+        return start, stop
@@ -0,0 +1,74 @@
+"""
+Flight-loop sampling scheduler and sim-time clock for FlightPlot.
+"""
+
+
+class SampleScheduler:
+    """
+    Decides on every flight-loop call which parameter groups are due.
+
+    `groups` maps a group name to (rateHz, payload); Due() returns the
+    payloads of the groups that are due (FlightPlot passes the list of
+    channel samplers of each group). A rate of 0 or less samples the group
+    on every frame. NextInterval() returns the value the flight-loop
+    callback should hand back to X-Plane: -1 (next frame) when a per-frame
+    group exists, otherwise the seconds until the next group falls due, so
+    the callback is not invoked more often than needed.
+    """
+
+    def __init__(self, groups):
+        self.groups = []
+        for name, (rate, payload) in groups.items():
+            period = 1.0 / rate if rate > 0 else 0.0
+            self.groups.append((name, period, payload))
+        self.perFrame = any(period == 0.0 for _, period, _ in self.groups)
+        self.nextDue = [0.0] * len(self.groups)
+        self.due = []
+
+    def Reset(self):
+        self.nextDue = [0.0] * len(self.groups)
+
+    def Due(self, now):
+        due = self.due
+        due.clear()
+        for i, (name, period, payload) in enumerate(self.groups):
+            if now < self.nextDue[i]:
+                continue
+            due.append(payload)
+            nxt = self.nextDue[i] + period
+            # Running behind the requested rate: resync rather than burst.
+            self.nextDue[i] = nxt if nxt > now else now + period
+        return due
+
+    def NextInterval(self, now):
+        if self.perFrame:
+            return -1
+        if not self.groups:
+            return 1.0
+        return max(min(self.nextDue) - now, 0.001)
+
+
+class SimClock:
+    """
+    Monotonic sample time stamps derived from sim time.
+
+    If the sim clock steps backwards (flight reload, replay), stamps keep
+    counting from the last one using the flight loop's elapsed time.
+    """
+
+    def __init__(self):
+        self.offset = 0.0
+        self.last = None
+
+    def Reset(self):
+        self.offset = 0.0
+        self.last = None
+
+    def Stamp(self, simTime, elapsed):
+        t = simTime + self.offset
+        if self.last is not None and t <= self.last:
+            step = elapsed if elapsed > 0 else 1e-6
+            self.offset += self.last + step - t
+            t = self.last + step
+        self.last = t
+        return t
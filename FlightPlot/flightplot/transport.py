@@ -0,0 +1,210 @@
+"""
+Fixed-capacity single-producer/single-consumer sample ring.
+"""
+
+import json
+from multiprocessing import shared_memory
+
+import numpy as np
+
+MAGIC = 0x46504C54  # "FPLT"
+
+# int64 header slots
+H_MAGIC = 0
+H_COLUMNS = 1
+H_CAPACITY = 2
+H_WRITE = 3      # rows ever written (owned by the producer)
+H_READ = 4       # rows ever read (owned by the consumer)
+H_OVERFLOW = 5   # rows dropped because the ring was full
+H_STOP = 6       # producer asks the consumer to shut down
+H_CLOSED = 7     # consumer has closed its window
+H_LAYOUT = 8     # layout epoch, odd while the producer rewrites the layout
+H_LAYOUT_LEN = 9
+H_UI_P50 = 10    # consumer refresh time percentiles in µs (owned by the consumer)
+H_UI_P99 = 11
+H_UI_MAX = 12
+H_UI_COUNT = 13
+H_UI_LAST = 14   # latest refresh time in µs
+HEADER_SLOTS = 16
+HEADER_BYTES = 8 * HEADER_SLOTS
+# Channel name of every data column after time, as JSON
+LAYOUT_BYTES = 4096
+DATA_OFFSET = HEADER_BYTES + LAYOUT_BYTES
+
+
+class SampleRing:
+    """
+    Lock-free SPSC ring of float64 rows over one preallocated buffer.
+
+    The producer (the X-Plane flight loop) owns the write index and the
+    consumer (the plot UI) owns the read index; each side only ever stores
+    its own index, so no lock is needed. The buffer is either a bytearray
+    (UI in a thread of the sim process) or a multiprocessing SharedMemory
+    block that an out-of-process viewer can Attach() to by name.
+
+    Write() never blocks and creates no per-frame containers: when the ring
+    is full the row is dropped and counted in the overflow slot.
+
+    Which channel each data column carries is published separately with
+    WriteLayout(); it is guarded by an epoch counter that is odd while the
+    producer rewrites it, so ReadLayout() never sees a half-written layout.
+    """
+
+    def __init__(self, buf, shm=None):
+        self.shm = shm
+        self.buf = buf
+        self.header = memoryview(buf)[:HEADER_BYTES].cast("q")
+        self.layout = memoryview(buf)[HEADER_BYTES:DATA_OFFSET]
+        self.columns = self.header[H_COLUMNS]
+        self.capacity = self.header[H_CAPACITY]
+        self.data = memoryview(buf)[DATA_OFFSET:DATA_OFFSET + 8 * self.columns * self.capacity].cast("d")
+        self.rows = np.frombuffer(buf, dtype=np.float64, count=self.columns * self.capacity,
+                                  offset=DATA_OFFSET).reshape(self.capacity, self.columns)
+
+    @classmethod
+    def Create(cls, columns, capacity, shared=False):
+        size = DATA_OFFSET + 8 * columns * capacity
+        if shared:
+            try:
+                # The creator unlinks the block itself, in Close(unlink=True)
+                shm = shared_memory.SharedMemory(create=True, size=size, track=False)
+            except TypeError:
+                # Python < 3.13 always registers it with the resource tracker,
+                # which is started with multiprocessing's executable
+                shm = shared_memory.SharedMemory(create=True, size=size)
+            buf = shm.buf
+        else:
+            shm = None
+            buf = bytearray(size)
+        header = memoryview(buf)[:HEADER_BYTES].cast("q")
+        header[H_COLUMNS] = columns
+        header[H_CAPACITY] = capacity
+        header[H_MAGIC] = MAGIC
+        header.release()
+        return cls(buf, shm)
+
+    @classmethod
+    def Attach(cls, name):
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13 registers every attach with the resource tracker,
+            # which would unlink the block when the viewer exits.
+            from multiprocessing import resource_tracker
+            shm = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(shm._name, "shared_memory")
+        if memoryview(shm.buf)[:8].cast("q")[H_MAGIC] != MAGIC:
+            shm.close()
+            raise ValueError(f"{name} is not a FlightPlot sample ring")
+        return cls(shm.buf, shm)
+
+    @property
+    def name(self):
+        return self.shm.name if self.shm is not None else None
+
+    def Write(self, t, record):
+        header = self.header
+        w = header[H_WRITE]
+        if w - header[H_READ] >= self.capacity:
+            header[H_OVERFLOW] += 1
+            return False
+        data = self.data
+        i = (w % self.capacity) * self.columns
+        data[i] = t
+        for v in record:
+            i += 1
+            data[i] = v
+        # Publish only after the row is complete.
+        header[H_WRITE] = w + 1
+        return True
+
+    def Read(self, maxRows):
+        """Copy out up to maxRows unread rows as an (n, columns) array."""
+        header = self.header
+        r = header[H_READ]
+        n = min(header[H_WRITE] - r, maxRows)
+        if n <= 0:
+            return self.rows[:0].copy()
+        start = r % self.capacity
+        first = min(n, self.capacity - start)
+        if first == n:
+            out = self.rows[start:start + n].copy()
+        else:
+            out = np.concatenate((self.rows[start:], self.rows[:n - first]))
+        header[H_READ] = r + n
+        return out
+
+    def WriteLayout(self, names):
+        """Publish the channel name of each data column (None for unused ones)."""
+        data = json.dumps(list(names)).encode("utf-8")
+        if len(data) > LAYOUT_BYTES:
+            raise ValueError("channel names do not fit the ring layout area")
+        header = self.header
+        epoch = header[H_LAYOUT]
+        header[H_LAYOUT] = epoch + 1
+        self.layout[:len(data)] = data
+        header[H_LAYOUT_LEN] = len(data)
+        header[H_LAYOUT] = epoch + 2
+
+    def ReadLayout(self, known=None):
+        """
+        (epoch, names) of the current layout, or None if it is still epoch
+        `known`, has never been written or is being rewritten right now.
+        """
+        header = self.header
+        epoch = header[H_LAYOUT]
+        if epoch == known or epoch == 0 or epoch & 1:
+            return None
+        data = bytes(self.layout[:header[H_LAYOUT_LEN]])
+        if header[H_LAYOUT] != epoch:
+            return None
+        return epoch, json.loads(data)
+
+    def Written(self):
+        return self.header[H_WRITE]
+
+    def Consumed(self):
+        return self.header[H_READ]
+
+    def Depth(self):
+        return self.header[H_WRITE] - self.header[H_READ]
+
+    def Overflow(self):
+        return self.header[H_OVERFLOW]
+
+    def WriteUiStats(self, stats):
+        """Publish the consumer's refresh timings (a Probe.stats() dict) to the producer."""
+        header = self.header
+        header[H_UI_P50] = stats["p50_us"]
+        header[H_UI_P99] = stats["p99_us"]
+        header[H_UI_MAX] = stats["max_us"]
+        header[H_UI_COUNT] = stats["count"]
+        header[H_UI_LAST] = stats["last_us"]
+
+    def UiStats(self):
+        """(p50, p99, max, count, last) last published by the consumer; the slots may be one update apart."""
+        header = self.header
+        return header[H_UI_P50], header[H_UI_P99], header[H_UI_MAX], header[H_UI_COUNT], header[H_UI_LAST]
+
+    # Each lifecycle slot has a single writer, like the indices.
+    def RequestStop(self):
+        self.header[H_STOP] = 1
+
+    def StopRequested(self):
+        return self.header[H_STOP] != 0
+
+    def MarkClosed(self):
+        self.header[H_CLOSED] = 1
+
+    def Closed(self):
+        return self.header[H_CLOSED] != 0
+
+    def Close(self, unlink=False):
+        self.rows = None
+        self.data.release()
+        self.layout.release()
+        self.header.release()
+        if self.shm is not None:
+            self.shm.close()
+            if unlink:
+                self.shm.unlink()
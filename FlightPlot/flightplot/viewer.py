@@ -0,0 +1,88 @@
+"""
+Out-of-process FlightPlot viewer.
+
+Started by PI_FlightPlot.py as `python -m flightplot.viewer`, so pyqtgraph
+rendering runs in its own interpreter and never holds the simulator's GIL.
+Samples arrive through the shared-memory SampleRing named by --ring.
+
+`python -m flightplot.viewer --replay FILE` plays a recording made by the
+plugin (flightplot.recorder) back through the same window instead.
+"""
+
+import argparse
+import os
+import sys
+
+from PyQt5 import QtWidgets, QtCore
+
+from .recorder import Recording
+from .transport import SampleRing
+from .window import PlotterWindow
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FlightPlot viewer process")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--ring", help="shared memory name of the sample ring")
+    source.add_argument("--replay", metavar="FILE", help="play back a FlightPlot recording")
+    parser.add_argument("--max-drain", type=int, default=2000)
+    parser.add_argument("--recording", help="recording file of the live session, used by Export")
+    parser.add_argument("--config", default="flightplot.json",
+                        help="parameter config file, for its derived channels")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="replay speed, 0 = as fast as the window drains")
+    parser.add_argument("--start", type=float, default=0.0,
+                        help="replay from this many seconds into the recording")
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        return Replay(args)
+
+    ring = SampleRing.Attach(args.ring)
+    parent = os.getppid()
+
+    app = QtWidgets.QApplication(sys.argv[:1])
+    window = PlotterWindow(ring, notifyStop=ring.MarkClosed, maxDrain=args.max_drain,
+                           recording=args.recording, config=args.config)
+    window.setWindowTitle("FlightPlot")
+    window.show()
+
+    # Close when the plugin toggles plotting off, or when X-Plane goes away
+    # without telling us.
+    def CheckProducer():
+        if ring.StopRequested() or os.getppid() != parent:
+            window.close()
+
+    watchdog = QtCore.QTimer()
+    watchdog.timeout.connect(CheckProducer)
+    watchdog.start(250)
+
+    app.setQuitOnLastWindowClosed(True)
+    try:
+        return app.exec_()
+    finally:
+        watchdog.stop()
+        ring.Close()
+
+
+def Replay(args):
+    recording = Recording(args.replay, speed=args.speed)
+    recording.Seek(args.start)
+
+    app = QtWidgets.QApplication(sys.argv[:1])
+    window = PlotterWindow(recording, notifyStop=lambda: None, maxDrain=args.max_drain,
+                           recording=args.replay, config=args.config)
+    window.setWindowTitle(f"FlightPlot - {os.path.basename(args.replay)}")
+    window.show()
+
+    app.setQuitOnLastWindowClosed(True)
+    try:
+        return app.exec_()
+    finally:
+        # The window's arrays are copies, nothing still points into the map.
+        window.source = None
+        recording.Close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
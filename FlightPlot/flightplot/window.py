@@ -0,0 +1,479 @@
+"""
+FlightPlot plot window. Runs either in a thread of the X-Plane process or in
+the separate viewer process (flightplot.viewer); it never touches xp.
+"""
+
+import os
+import sys
+import threading
+
+from PyQt5 import QtWidgets, QtCore
+import pyqtgraph as pg
+import numpy as np
+
+from xpcommon.export import chunked, export
+from xpcommon.profiler import Profiler
+
+from .derived import DerivedChannel
+from .export import ExportRecording
+from .registry import ParameterRegistry
+from .ringbuffer import RingBuffer
+from .lod import MinMaxPyramid
+from .ranges import SlidingExtremes
+
+COLORS = ["#4DB6AC", "#F08913", "#DDC8E0", "#FFD54F", "#90A4AE", "#2B16E9"]
+
+
+class Channel:
+    """Samples and plot items of one plotted channel, allocated only while it is enabled."""
+
+    def __init__(self, name, maxlen):
+        self.name = name
+        self.buffer = RingBuffer(["time", name], maxlen)
+        self.lod = MinMaxPyramid(self.buffer, "time", [name])
+        self.extremes = SlidingExtremes()
+        self.yRange = None
+        self.viewbox = None
+        self.axis = None
+        self.curve = None
+        self.checkbox = None
+
+    def Clear(self):
+        self.buffer.Clear()
+        self.lod.Clear()
+        self.extremes.Clear()
+        self.yRange = None
+
+    def Extend(self, rows):
+        """Append (n, 2) rows of (time, value)."""
+        self.buffer.Extend(rows)
+        self.lod.Update()
+        self.extremes.Push(rows[:, 0].tolist(), rows[:, 1].tolist())
+        self.extremes.Evict(self.buffer.Column("time")[0])
+
+
+class PlotterWindow(QtWidgets.QWidget):
+    # Export runs on a worker thread and reports back through this signal.
+    exportFinished = QtCore.pyqtSignal(str)
+
+    def __init__(self, source, notifyStop, maxDrain=2000, recording=None, config=None):
+        super().__init__()
+
+        # `source` provides Read(maxRows) and ReadLayout(epoch): a SampleRing
+        # or a Recording. Channels come and go with its layout.
+        self.source = source
+        self.notifyStop = notifyStop
+        self.maxDrain = maxDrain
+        # Recording file of this session, if any; Export then writes the
+        # whole session rather than only the samples still in the buffer.
+        self.recording = recording
+        # Derived channels are defined in the "derived" section of the
+        # parameter config file, polled about once a second.
+        self.config = ParameterRegistry(config, {}, {}) if config else None
+        self.derived = {}
+        self.derivedFailed = set()  # names of derived channels whose error was logged
+        self.ticks = 0
+        # Refresh timings are handed back through the source (the ring's UI
+        # stats slots), so the plugin reports them with its own.
+        self.profiler = Profiler("FlightPlotViewer")
+        self.updateProbe = self.profiler.probe("UpdatePlot")
+
+        self.isRunning = True
+        self.isPaused = False
+        self.isClosing = False
+
+        self.maxlen = 14400
+        # Time of every drained row; drives the X range and buffer exports.
+        self.buffer = RingBuffer(["time"], self.maxlen)
+        self.channels = {}
+        self.slots = []  # channel name of each source data column
+        self.layoutEpoch = None
+        self.colorIndex = 0
+
+        self.setStyleSheet("""
+            QWidget {
+                background-color: #0f1116;
+                color: #e0e0e0;
+                font-family: "Segoe UI", "Roboto", sans-serif;
+                font-size: 12pt;
+            }
+            QCheckBox {
+                spacing: 8px;
+                font-weight: 600;
+            }
+            QPushButton {
+                background-color: #2d89ef;
+                border-radius: 10px;
+                padding: 8px 14px;
+                font-size: 12pt; font-weight: 600; color: white;
+            }
+            QPushButton:hover {
+                background-color: #1b5fbf;
+            }
+        """)
+
+        main_layout = QtWidgets.QHBoxLayout(self)
+
+        self.plot_widget = pg.PlotWidget(background="#0f1116")
+        pi = self.plot_widget.getPlotItem()
+        self.plot_widget.showGrid(x=True, y=True, alpha=0.25)
+        pi.getAxis("bottom").setTextPen("#CCCCCC")
+        pi.getAxis("left").setTextPen("#CCCCCC")
+        pi.showAxis("right", False)
+
+        main_layout.addWidget(self.plot_widget, 4)
+
+        self.base_curve = self.plot_widget.plot([], [], pen=pg.mkPen((0, 0, 0, 0)))
+        # Axes of removed channels leave their grid column empty.
+        self.axisColumn = 3
+
+        side_panel = QtWidgets.QFrame()
+        side_panel.setStyleSheet("QFrame { background-color: #181b22; border-radius: 12px; }")
+        side_layout = QtWidgets.QVBoxLayout(side_panel)
+        side_layout.setContentsMargins(15, 15, 15, 15)
+
+        title = QtWidgets.QLabel("<--- PARAMETERS --->")
+        title.setStyleSheet("font-size: 12pt; font-weight: bold; color: #ffffff;")
+        side_layout.addWidget(title)
+
+        self.checkbox_layout = QtWidgets.QVBoxLayout()
+        side_layout.addLayout(self.checkbox_layout)
+
+        side_layout.addStretch()
+
+        btn_row = QtWidgets.QGridLayout()
+        self.pause_btn = QtWidgets.QPushButton("Pause")
+        self.reset_btn = QtWidgets.QPushButton("Reset")
+        self.export_btn = QtWidgets.QPushButton("Export")
+        btn_row.addWidget(self.pause_btn, 0, 0, 1, 2)
+        btn_row.addWidget(self.reset_btn, 1, 0, 1, 2)
+        btn_row.addWidget(self.export_btn, 2, 0, 1, 2)
+        side_layout.addLayout(btn_row)
+        self.pause_btn.clicked.connect(self.TogglePauseResume)
+        self.reset_btn.clicked.connect(self.ResetPlotting)
+        self.export_btn.clicked.connect(self.ExportData)
+        self.exportFinished.connect(self.ExportFinished)
+
+        main_layout.addWidget(side_panel, 1)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.UpdatePlot)
+        self.t0 = None
+        self.timer.start(200)
+
+        pi.vb.sigResized.connect(self.UpdateViews)
+        pi.vb.sigXRangeChanged.connect(self.XRangeChanged)
+        self.SyncLayout()
+        if self.config is not None:
+            self.SyncDerived()
+        self.UpdateViews()
+
+    def closeEvent(self, event):
+        self.isClosing = True
+        if self.timer.isActive():
+            self.timer.stop()
+        try:
+            self.notifyStop()
+        finally:
+            super().closeEvent(event)
+
+    def UpdateViews(self):
+        pi = self.plot_widget.getPlotItem()
+        vb_main = pi.vb
+        rect = vb_main.sceneBoundingRect()
+        for ch in self.channels.values():
+            ch.viewbox.setGeometry(rect)
+            ch.viewbox.linkedViewChanged(vb_main, ch.viewbox.XAxis)
+
+    def SyncLayout(self):
+        layout = self.source.ReadLayout(self.layoutEpoch)
+        if layout is None:
+            return
+        self.layoutEpoch, names = layout
+        wanted = set(names) - {None}
+        for name in [n for n in self.channels if n not in wanted and n not in self.derived]:
+            self.RemoveChannel(name)
+        for name in names:
+            if name in self.derived:
+                # A sampled channel takes precedence over a derived one.
+                print(f"[FlightPlot] derived channel {name} is now a parameter, dropped", file=sys.stderr)
+                self.RemoveChannel(name)
+                del self.derived[name]
+            if name is not None and name not in self.channels:
+                self.AddChannel(name)
+        self.slots = names
+        if self.channels and not any(ch.checkbox.isChecked() for ch in self.channels.values()):
+            next(iter(self.channels.values())).checkbox.setChecked(True)
+        self.UpdateSelected()
+
+    def SyncDerived(self):
+        try:
+            if not self.config.Poll():
+                return
+        except ValueError as e:
+            print(f"[FlightPlot] {e}", file=sys.stderr)
+            return
+        wanted = self.config.derived
+        for name in [n for n, d in self.derived.items() if wanted.get(n) != d.expression]:
+            self.RemoveChannel(name)
+            del self.derived[name]
+            self.derivedFailed.discard(name)
+        for name, expression in wanted.items():
+            if name in self.derived:
+                continue
+            if name in self.channels:
+                print(f"[FlightPlot] derived channel {name} clashes with a parameter", file=sys.stderr)
+                continue
+            try:
+                derived = DerivedChannel(name, expression)
+            except ValueError as e:
+                print(f"[FlightPlot] derived channel {e}", file=sys.stderr)
+                continue
+            self.derived[name] = derived
+            self.AddChannel(name)
+            self.Backfill(derived)
+        # Evaluate in file order, so a channel can build on the ones above it.
+        self.derived = {n: self.derived[n] for n in wanted if n in self.derived}
+        self.UpdateSelected()
+
+    def Backfill(self, derived):
+        """Run a new derived channel over the samples its inputs already hold."""
+        inputs = [self.channels[n] for n in derived.inputs if n in self.channels]
+        n = min((len(ch.buffer) for ch in inputs), default=0)
+        if n == 0:
+            return
+        times = self.buffer.Column("time")[-n:]
+        columns = {ch.name: ch.buffer.Column(ch.name)[-n:].tolist() for ch in inputs}
+        self.StepDerived(times, columns, [derived])
+
+    def StepDerived(self, times, columns, derived):
+        # One O(1) step per sample and channel; later channels see the
+        # values the earlier ones produced for the same sample.
+        values = {}
+        out = [[] for _ in derived]
+        for i, t in enumerate(times.tolist()):
+            for name, column in columns.items():
+                values[name] = column[i]
+            for d, results in zip(derived, out):
+                try:
+                    v = d.Step(t, values)
+                except Exception as e:
+                    # One broken channel reads NaN; the others and the redraw go on
+                    v = float("nan")
+                    if d.name not in self.derivedFailed:
+                        self.derivedFailed.add(d.name)
+                        print(f"[FlightPlot] derived channel {d.name}: {e!r}", file=sys.stderr)
+                values[d.name] = v
+                results.append(v)
+        for d, results in zip(derived, out):
+            self.channels[d.name].Extend(np.column_stack((times, results)))
+
+    def AddChannel(self, name):
+        ch = Channel(name, self.maxlen)
+        color = COLORS[self.colorIndex % len(COLORS)]
+        self.colorIndex += 1
+        pi = self.plot_widget.getPlotItem()
+
+        ch.viewbox = pg.ViewBox()
+        ch.viewbox.disableAutoRange(axis=ch.viewbox.YAxis)
+        ch.axis = pg.AxisItem(orientation="right")
+        ch.axis.setPen(color)
+        ch.axis.setTextPen(color)
+        ch.axis.setLabel(text=name, color=color)
+
+        pi.layout.addItem(ch.axis, 2, self.axisColumn)
+        self.axisColumn += 1
+        pi.scene().addItem(ch.viewbox)
+        ch.axis.linkToView(ch.viewbox)
+        ch.viewbox.setXLink(pi.vb)
+        ch.viewbox.setGeometry(pi.vb.sceneBoundingRect())
+
+        ch.curve = pg.PlotCurveItem(pen=pg.mkPen(color, width=2))
+        ch.viewbox.addItem(ch.curve)
+        ch.axis.setVisible(False)
+        ch.curve.setVisible(False)
+
+        ch.checkbox = QtWidgets.QCheckBox(name)
+        ch.checkbox.setStyleSheet(f"QCheckBox {{ color: {color}; font-weight: bold; }}")
+        ch.checkbox.stateChanged.connect(self.UpdateSelected)
+        self.checkbox_layout.addWidget(ch.checkbox)
+        self.channels[name] = ch
+
+    def RemoveChannel(self, name):
+        ch = self.channels.pop(name)
+        pi = self.plot_widget.getPlotItem()
+        pi.layout.removeItem(ch.axis)
+        pi.scene().removeItem(ch.axis)
+        pi.scene().removeItem(ch.viewbox)
+        self.checkbox_layout.removeWidget(ch.checkbox)
+        ch.checkbox.deleteLater()
+
+    def UpdateSelected(self):
+        # Showing or hiding an axis resizes the main view, which triggers
+        # UpdateViews through sigResized.
+        for ch in self.channels.values():
+            vis = ch.checkbox.isChecked()
+            ch.curve.setVisible(vis)
+            ch.axis.setVisible(vis)
+            if not vis:
+                ch.yRange = None
+        self.RedrawCurves()
+
+    def XRangeChanged(self):
+        # While X auto-ranges the timer redraws anyway; only follow user pan/zoom.
+        if not self.plot_widget.getPlotItem().vb.autoRangeEnabled()[0]:
+            self.RedrawCurves()
+
+    def TogglePauseResume(self):
+        if not self.isRunning:
+            return
+        if not self.isPaused:
+            self.isPaused = True
+            self.timer.stop()
+            self.pause_btn.setText("Resume")
+        else:
+            self.isPaused = False
+            self.timer.start(200)
+            self.pause_btn.setText("Pause")
+
+    def ResetPlotting(self):
+        self.isRunning = True
+        self.isPaused = False
+        if self.timer.isActive():
+            self.timer.stop()
+        self.buffer.Clear()
+        for ch in self.channels.values():
+            ch.Clear()
+            ch.curve.setData([], [])
+        for d in self.derived.values():
+            d.Reset()
+        self.base_curve.setData([], [])
+        self.pause_btn.setText("Pause")
+
+        self.t0 = None
+        for i, ch in enumerate(self.channels.values()):
+            ch.checkbox.setChecked(i == 0)
+        self.UpdateSelected()
+        self.timer.start(200)
+
+    def ExportData(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Export samples", "flightplot.csv",
+            "CSV (*.csv);;Compressed columns (*.colz)"
+        )
+        if not path:
+            return
+        recording = self.recording
+        if recording:
+            job = lambda: ExportRecording(recording, path)
+        else:
+            # Copy the buffer once (at most maxlen rows); chunks are cut
+            # from the copy while plotting carries on.
+            # Channels added later than the oldest buffered row start with NaN.
+            n = len(self.buffer)
+            names = ["time"] + list(self.channels)
+            columns = [self.buffer.Column("time").copy()]
+            for ch in self.channels.values():
+                values = ch.buffer.Column(ch.name)
+                columns.append(np.concatenate((np.full(n - len(values), np.nan), values)))
+            job = lambda: export(path, names, chunked(columns))
+        self.export_btn.setEnabled(False)
+        self.export_btn.setText("Exporting...")
+        threading.Thread(target=self.RunExport, args=(job, path), name="FlightPlotExport", daemon=True).start()
+
+    def RunExport(self, job, path):
+        try:
+            message = f"{job()} samples exported to {os.path.basename(path)}"
+        except Exception as e:
+            message = f"Export failed: {e}"
+        self.exportFinished.emit(message)
+
+    def ExportFinished(self, message):
+        self.export_btn.setEnabled(True)
+        self.export_btn.setText("Export")
+        self.export_btn.setToolTip(message)
+        if not self.isClosing:
+            QtWidgets.QMessageBox.information(self, "FlightPlot", message)
+
+    def UpdatePlot(self):
+        if not self.isRunning or self.isPaused or self.isClosing:
+            return
+        with self.updateProbe:
+            self.Refresh()
+        self.source.WriteUiStats(self.updateProbe.stats())
+
+    def Refresh(self):
+        # The layout is read before the rows, so a column freed in the
+        # meantime can only still hold its old channel or NaN.
+        self.SyncLayout()
+        self.ticks += 1
+        if self.config is not None and self.ticks % 5 == 0:
+            self.SyncDerived()
+
+        # Drain at most maxDrain samples per tick; anything left over is
+        # picked up on the next tick instead of stalling the event loop.
+        rows = self.source.Read(self.maxDrain)
+        if len(rows) == 0:
+            return
+
+        if self.t0 is None:
+            self.t0 = rows[0, 0]
+        rows[:, 0] -= self.t0
+        self.buffer.Extend(rows[:, :1])
+
+        needed = set().union(*(d.inputs for d in self.derived.values()))
+        columns = {}
+        for j, name in enumerate(self.slots):
+            ch = self.channels.get(name)
+            if ch is None:
+                continue
+            ch.Extend(rows[:, [0, j + 1]])
+            if name in needed:
+                columns[name] = rows[:, j + 1].tolist()
+        if self.derived:
+            self.StepDerived(rows[:, 0], columns, list(self.derived.values()))
+
+        self.RedrawCurves()
+
+    def RedrawCurves(self):
+        n = len(self.buffer)
+        if n == 0:
+            return
+
+        # The invisible base curve only needs the two end points to drive
+        # the X auto-range of the main view.
+        t = self.buffer.Column("time")
+        self.base_curve.setData([t[0], t[-1]], [0, 0])
+
+        vb_main = self.plot_widget.getPlotItem().vb
+        following = vb_main.autoRangeEnabled()[0]
+        if following:
+            x0, x1 = t[0], t[-1]
+        else:
+            x0, x1 = vb_main.viewRange()[0]
+
+        # Level of detail follows the visible span and viewport width, so
+        # long sessions draw a few points per pixel whatever their length.
+        for ch in self.channels.values():
+            if not ch.checkbox.isChecked() or len(ch.buffer) == 0:
+                continue
+            segments = ch.lod.Select(x0, x1, vb_main.width())
+            y = ch.lod.Values(segments, ch.name)
+            # NaN samples (gaps, failed derived values) break the line
+            ch.curve.setData(ch.lod.Time(segments), y, connect="finite")
+            # Following the whole buffer, the sliding extremes are exact.
+            # After a pan/zoom the drawn envelope already holds the
+            # visible min/max at a few points per pixel.
+            if following:
+                self.SetYRange(ch, ch.extremes.Bounds())
+            elif len(y) and not np.isnan(y).all():
+                self.SetYRange(ch, (float(np.nanmin(y)), float(np.nanmax(y))))
+
+    def SetYRange(self, ch, bounds):
+        if bounds is None or bounds == ch.yRange:
+            return
+        ch.yRange = bounds
+        lo, hi = bounds
+        if hi - lo < 1e-9:
+            lo, hi = lo - 1.0, hi + 1.0
+        ch.viewbox.setYRange(lo, hi, padding=0.05)
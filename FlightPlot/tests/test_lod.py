@@ -0,0 +1,57 @@
+"""
+NaN samples (a derivative's first point, a failing derived channel, a
+missing dataref) must not hide the real values sharing their LOD block.
+
+    python -m unittest discover FlightPlot/tests
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from flightplot import MinMaxPyramid, RingBuffer  # noqa: E402
+
+
+class NanBlockTest(unittest.TestCase):
+    def setUp(self):
+        self.buffer = RingBuffer(["time", "v"], 64)
+        self.pyramid = MinMaxPyramid(self.buffer, "time", ["v"], factor=4)
+
+    def extend(self, values):
+        start = self.buffer.total
+        t = np.arange(start, start + len(values), dtype=np.float64)
+        self.buffer.Extend(np.column_stack((t, values)))
+        self.pyramid.Update()
+
+    def envelope(self, level):
+        ring = self.pyramid.levels[level]
+        return ring.Column("min:v").tolist(), ring.Column("max:v").tolist()
+
+    def test_nan_inside_block(self):
+        self.extend([1.0, np.nan, 50.0, 10.0, -3.0, 2.0, 2.0, 2.0])
+        lo, hi = self.envelope(1)
+        self.assertEqual(lo, [1.0, -3.0])
+        self.assertEqual(hi, [50.0, 2.0])
+
+    def test_nan_reaches_coarser_levels(self):
+        values = [2.0] * 16
+        values[0] = np.nan
+        values[9] = 50.0
+        self.extend(values)
+        lo, hi = self.envelope(2)
+        self.assertEqual((lo, hi), ([2.0], [50.0]))
+
+    def test_all_nan_block_stays_a_gap(self):
+        self.extend([np.nan] * 4 + [1.0, 2.0, 3.0, 4.0])
+        lo, hi = self.envelope(1)
+        self.assertTrue(np.isnan(lo[0]) and np.isnan(hi[0]))
+        self.assertEqual((lo[1], hi[1]), (1.0, 4.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,10 @@
 from XPPython3 import xp
 import socket
-import json
+import time
+from xpcommon import DataRefSampler, StatsDataRef
+from xpcommon.profiler import Profiler
+from trajplot import protocol
+from trajplot.simplify import distance
 
 
 class PythonInterface:
@@ -10,141 +14,69 @@ class PythonInterface:
         self.Sig = "vyomshukla.plugin.trajplot"
         self.Desc = "Sends aircraft lat/lon/alt/heading via UDP"
 
-        self.enabled = True
+        self.enabled = False  # Plugin starts OFF by default
         self.sock = None
         self.menu_id = None
         self.menu_item = None
 
-        self.dr_lat = None
-        self.dr_lon = None
-        self.dr_alt = None
-        self.dr_head = None
+        self.server = ("127.0.0.1", 49005)
+        self.seq = 0
+        self.packet = bytearray(protocol.RECORD.size)
+
+        # Adaptive send rate: the flight loop runs often enough for a fix
+        # every sendDistance metres or sendTurn degrees of turn, between
+        # minInterval and maxInterval seconds apart. A fix within the
+        # dead-band of the last one sent is skipped, but one is always sent
+        # every keepaliveInterval seconds so the server keeps the aircraft.
+        self.minInterval = 0.1
+        self.maxInterval = 1.0
+        self.sendDistance = 50.0
+        self.sendTurn = 1.5
+        self.deadbandDistance = 2.0
+        self.deadbandAlt = 1.0
+        self.deadbandHeading = 0.5
+        self.keepaliveInterval = 5.0
+        self.lastFix = None  # (lat, lon, alt, heading) last sent
+        self.lastSent = 0.0
+
+        # Timing of the flight loop and send failures; published as a
+        # dataref, sent to the server (GET /stats) every statsInterval
+        # seconds and logged every statsLogInterval seconds (None = never)
+        self.profiler = Profiler("TrajPlot")
+        self.loopProbe = self.profiler.probe("flightLoopCB", budget_us=500)
+        self.profiler.count("sent", 0)
+        self.profiler.count("send_errors", 0)
+        self.profiler.count("suppressed", 0)
+        self.profiler.gauge("interval_ms", 0)
+        self.statsDataRef = None
+        self.statsInterval = 10.0
+        self.statsLogInterval = 300.0
+        self.statsSent = self.statsLogged = 0.0
+
+        self.sampler = DataRefSampler([
+            ("time", "sim/time/total_running_time_sec"),
+            ("lat", "sim/flightmodel/position/latitude"),
+            ("lon", "sim/flightmodel/position/longitude"),
+            ("alt", "sim/flightmodel/position/elevation"),
+            ("heading", "sim/flightmodel/position/psi"),
+        ])
+        self.motion = DataRefSampler([
+            ("groundspeed", "sim/flightmodel/position/groundspeed"),  # m/s
+            ("turnRate", "sim/flightmodel/position/R"),  # deg/s
+        ])
 
-    # ===================================================
-    # Plugin start
-    # ===================================================
     def XPluginStart(self):
 
-        # UDP
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
 
-        # Datarefs
-        self.dr_lat = xp.findDataRef("sim/flightmodel/position/latitude")
-        self.dr_lon = xp.findDataRef("sim/flightmodel/position/longitude")
-        self.dr_alt = xp.findDataRef("sim/flightmodel/position/elevation")
-        self.dr_head = xp.findDataRef("sim/flightmodel/position/psi")
-
-        # ================================
-        # Create menu in Plugins menu
-        # ================================
-        parent_menu = xp.findPluginsMenu()  # valid in your version
-        item_ref = xp.appendMenuItem(parent_menu, "TrajPlot", 0)
-
-        self.menu_id = xp.createMenu(
-            "TrajPlot",
-            parent_menu,
-            item_ref,
-            self.menuHandler,
-            0
-        )
-
-        self.menu_item = xp.appendMenuItem(self.menu_id, "Toggle TrajPlot: ON", 0)
-
-        # Register callback
-        xp.registerFlightLoopCallback(self.flightLoopCB, 1.0, 0)
-
-        xp.log("[TrajPlot] Started successfully")
-
-        return self.Name, self.Sig, self.Desc
-
-    # ===================================================
-    def XPluginEnable(self):
-        return 1
-
-    def XPluginDisable(self):
-        xp.unregisterFlightLoopCallback(self.flightLoopCB, 0)
-
-    def XPluginStop(self):
-        if self.sock:
-            self.sock.close()
-
-    def XPluginReceiveMessage(self, inFromWho, inMessage, inParam):
-        pass
-
-    # ===================================================
-    # Menu handler
-    # ===================================================
-    def menuHandler(self, menuRef, itemRef):
-
-        self.enabled = not self.enabled
-        next_state = "OFF" if self.enabled else "ON"
-
-        xp.setMenuItemName(self.menu_id, self.menu_item, f"Toggle TrajPlot: {next_state}")
-
-        if self.enabled:
-            xp.registerFlightLoopCallback(self.flightLoopCB, 1.0, 0)
-            xp.log("[TrajPlot] Enabled")
-        else:
-            try:
-                xp.unregisterFlightLoopCallback(self.flightLoopCB, 0)
-            except:
-                pass
-            xp.log("[TrajPlot] Disabled")
-
-    # ===================================================
-    # Flight Loop
-    # ===================================================
-    def flightLoopCB(self, elapsed1, elapsed2, counter, refcon):
-
-        if not self.enabled:
-            return 1.0
+        # Datarefs (types resolved once, read into one reused record)
+        self.sampler.resolve()
+        self.motion.resolve()
 
         try:
-            lat = xp.getDatad(self.dr_lat)
-            lon = xp.getDatad(self.dr_lon)
-            alt = xp.getDatad(self.dr_alt)
-            head = xp.getDatad(self.dr_head)
-
-            pkt = {
-                "lat": lat,
-                "lon": lon,
-                "alt": alt,
-                "heading": head
-            }
-
-            self.sock.sendto(json.dumps(pkt).encode(), ("127.0.0.1", 49005))
-
-        except Exception as e:from XPPython3 import xp
-import socket
-import json
-
-
-class PythonInterface:
-
-    def __init__(self):
-        self.Name = "TrajPlot"
-        self.Sig = "vyomshukla.plugin.trajplot"
-        self.Desc = "Sends aircraft lat/lon/alt/heading via UDP"
-
-        self.enabled = False  # Plugin starts OFF by default
-        self.sock = None
-        self.menu_id = None
-        self.menu_item = None
-
-        self.dr_lat = None
-        self.dr_lon = None
-        self.dr_alt = None
-        self.dr_head = None
-
-    def XPluginStart(self):
-
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-
-        # Datarefs
-        self.dr_lat = xp.findDataRef("sim/flightmodel/position/latitude")
-        self.dr_lon = xp.findDataRef("sim/flightmodel/position/longitude")
-        self.dr_alt = xp.findDataRef("sim/flightmodel/position/elevation")
-        self.dr_head = xp.findDataRef("sim/flightmodel/position/psi")
+            self.statsDataRef = StatsDataRef("vyomshukla/trajplot/stats", self.profiler).register()
+        except Exception as e:
+            xp.log(f"[TrajPlot] stats dataref not available ({e})")
 
         # Menu
         parent_menu = xp.findPluginsMenu()
@@ -162,10 +94,7 @@ class PythonInterface:
         xp.log("[TrajPlot] Loaded (OFF by default)")
 
         # Send initial OFF status
-        try:
-            self.sock.sendto(json.dumps({"status": "OFF"}).encode(), ("127.0.0.1", 49005))
-        except:
-            pass
+        self.sendStatusOff()
 
         return self.Name, self.Sig, self.Desc
 
@@ -180,14 +109,17 @@ class PythonInterface:
         return 1
 
     def XPluginStop(self):
-        try:
-            self.sock.sendto(json.dumps({"status": "OFF"}).encode(), ("127.0.0.1", 49005))
-        except:
-            pass
+        self.sendStatusOff()
+
+        if self.statsDataRef:
+            self.statsDataRef.unregister()
 
         if self.sock:
             self.sock.close()
 
+    def XPluginReceiveMessage(self, inFromWho, inMessage, inParam):
+        pass
+
     # ========== MENU HANDLER ==========
     def menuHandler(self, menuRef, itemRef):
 
@@ -198,7 +130,9 @@ class PythonInterface:
             # Plugin turned ON → show "Toggle: OFF"
             xp.setMenuItemName(self.menu_id, self.menu_item, "Toggle: OFF")
 
-            xp.registerFlightLoopCallback(self.flightLoopCB, 1.0, 0)
+            # First fix right away
+            self.lastFix = None
+            xp.registerFlightLoopCallback(self.flightLoopCB, self.minInterval, 0)
             xp.log("[TrajPlot] Enabled")
 
         else:
@@ -211,13 +145,57 @@ class PythonInterface:
                 pass
 
             # Let server know plugin is OFF
-            try:
-                self.sock.sendto(json.dumps({"status": "OFF"}).encode(), ("127.0.0.1", 49005))
-            except:
-                pass
+            self.sendStatusOff()
+            self.reportStats(final=True)
 
             xp.log("[TrajPlot] Disabled")
 
+    # ========== PACKETS ==========
+    def send(self, flags, simTime, lat, lon, alt, heading):
+        self.seq += 1
+        protocol.pack_into(self.packet, 0, flags, 0, self.seq, simTime, lat, lon, alt, heading)
+        self.sock.sendto(self.packet, self.server)
+        self.profiler.count("sent")
+
+    def moved(self, fix):
+        """Whether a (time, lat, lon, alt, heading) fix is outside the dead-band of the last one sent."""
+        if self.lastFix is None:
+            return True
+        lat0, lon0, alt0, heading0 = self.lastFix
+        _, lat, lon, alt, heading = fix
+        return (distance(lat0, lon0, lat, lon) >= self.deadbandDistance
+                or abs(alt - alt0) >= self.deadbandAlt
+                or abs((heading - heading0 + 180.0) % 360.0 - 180.0) >= self.deadbandHeading)
+
+    def nextInterval(self):
+        """Seconds to the next flight loop call for the current ground speed and turn rate."""
+        groundspeed, turnRate = self.motion.sample()
+        interval = self.maxInterval
+        if groundspeed > 0:
+            interval = min(interval, self.sendDistance / groundspeed)
+        if abs(turnRate) > 0:
+            interval = min(interval, self.sendTurn / abs(turnRate))
+        return max(interval, self.minInterval)
+
+    def sendStatusOff(self):
+        nan = protocol.NaN
+        try:
+            self.send(0, nan, nan, nan, nan, nan)
+        except:
+            pass
+
+    def reportStats(self, final=False):
+        now = time.monotonic()
+        if self.statsLogInterval and (final or now - self.statsLogged >= self.statsLogInterval):
+            self.statsLogged = now
+            xp.log(self.profiler.line())
+        if self.statsInterval and (final or now - self.statsSent >= self.statsInterval):
+            self.statsSent = now
+            try:
+                self.sock.sendto(self.profiler.packet(), self.server)
+            except OSError:
+                self.profiler.count("send_errors")
+
     # ========== FLIGHT LOOP ==========
     def flightLoopCB(self, elapsed1, elapsed2, counter, refcon):
 
@@ -225,22 +203,26 @@ class PythonInterface:
         if not self.enabled:
             return 1.0
 
-        try:
-            pkt = {
-                "lat": xp.getDatad(self.dr_lat),
-                "lon": xp.getDatad(self.dr_lon),
-                "alt": xp.getDatad(self.dr_alt),
-                "heading": xp.getDatad(self.dr_head),
-                "status": "ON"
-            }
-
-            self.sock.sendto(json.dumps(pkt).encode(), ("127.0.0.1", 49005))
-
-        except Exception as e:
-            xp.log(f"[TrajPlot] ERROR: {e}")
-
-        return 1.0
-
-            xp.log(f"[TrajPlot] ERROR: {e}")
-
-        return 1.0
+        interval = self.maxInterval
+        with self.loopProbe:
+            try:
+                fix = self.sampler.sample()
+                now = time.monotonic()
+                if self.moved(fix) or now - self.lastSent >= self.keepaliveInterval:
+                    self.send(protocol.FLAG_ON, *fix)
+                    self.lastFix = tuple(fix[1:])
+                    self.lastSent = now
+                else:
+                    self.profiler.count("suppressed")
+                interval = self.nextInterval()
+                self.profiler.gauge("interval_ms", round(interval * 1000.0))
+
+            except OSError as e:
+                self.profiler.count("send_errors")
+                xp.log(f"[TrajPlot] ERROR: {e}")
+
+            except Exception as e:
+                xp.log(f"[TrajPlot] ERROR: {e}")
+
+        self.reportStats()
+        return interval
@@ -2,54 +2,197 @@ import http.server
 import socketserver
 import socket
 import threading
-import json
+import argparse
+import asyncio
+import os
+import signal
+import sys
+from urllib.parse import urlsplit
 
-# Latest data from plugin
-latest_data = {"status": "OFF"}
+# xpcommon, shared with the plugins, sits next to this folder in the repository
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
 
-# ===================== UDP LISTENER ======================
-def udp_listener():
-    global latest_data
+from trajplot.fleet import Fleet
+from trajplot.api import get_json, get_export, to_json
+from trajplot.assets import AssetCache
+from trajplot.capture import CaptureWriter, Replay
+from trajplot.spatial import load_geofences
+
+# History kept per aircraft for each minute of --history: the plugin sends
+# at most 10 fixes a second, so this holds at least that many minutes
+FIXES_PER_MINUTE = 600
 
+# Latest record and trail of every aircraft, keyed by sender and source id
+fleet = Fleet(history=60 * FIXES_PER_MINUTE, timeout=30.0)
+# index.html, served from memory
+assets = AssetCache(os.path.dirname(os.path.abspath(__file__)))
+
+# ===================== UDP LISTENER ======================
+def udp_listener(port=49005, capture=None):
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    sock.bind(("0.0.0.0", 49005))
+    sock.bind(("0.0.0.0", port))
 
-    print("Listening for TrajPlot data on UDP port 49005...")
+    print(f"Listening for TrajPlot data on UDP port {port}...")
 
     while True:
-        packet, addr = sock.recvfrom(2048)
+        packet, addr = sock.recvfrom(65535)
+        if capture is not None:
+            capture.write(packet, addr)
         try:
-            data = json.loads(packet.decode())
-
-            # Plugin OFF signal
-            if "status" in data and data["status"] == "OFF":
-                latest_data = {"status": "OFF"}
-                print("Plugin stopped — data reset.")
-            else:
-                latest_data = data
-
+            # Binary records or legacy JSON, auto-detected per datagram
+            for key in fleet.ingest_packet(packet, addr):
+                print(f"Plugin stopped — data reset ({key}).")
         except:
             pass
 
 
-# Start listener thread
-threading.Thread(target=udp_listener, daemon=True).start()
-
 # ===================== WEB SERVER ======================
-class Handler(http.server.SimpleHTTPRequestHandler):
+class Handler(http.server.BaseHTTPRequestHandler):
     def do_GET(self):
-        if self.path == "/data":
+        url = urlsplit(self.path)
+        try:
+            data = get_json(fleet, url.path, url.query)
+            export = get_export(fleet, url.query) if url.path == "/export" else None
+        except KeyError:
+            return self.send_error(404, "Unknown aircraft")
+        except ValueError:
+            return self.send_error(400, "Bad query")
+
+        if data is not None:
             self.send_response(200)
             self.send_header("Content-Type", "application/json")
             self.end_headers()
-            self.wfile.write(json.dumps(latest_data).encode())
+            self.wfile.write(to_json(data))
+        elif export is not None:
+            self.send_export(*export)
+        elif url.path == "/stream":
+            self.stream()
         else:
-            return http.server.SimpleHTTPRequestHandler.do_GET(self)
+            self.send_asset(url.path)
+
+    def do_HEAD(self):
+        self.send_asset(urlsplit(self.path).path, head=True)
+
+    def send_asset(self, path, head=False):
+        asset = assets.get(path)
+        if asset is None:
+            return self.send_error(404, "Not found")
+        status, headers, body = asset.response(self.headers.get("If-None-Match"),
+                                               self.headers.get("Accept-Encoding"))
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def send_export(self, name, ctype, body):
+        # No Content-Length: the file is produced chunk by chunk while sending
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Disposition", f'attachment; filename="{name}"')
+        self.end_headers()
+        try:
+            for piece in body:
+                self.wfile.write(piece)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
 
+    def stream(self):
+        # Server-sent events: one message per fleet change, holding only the
+        # aircraft that changed (the first message carries the whole fleet).
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        since = 0
+        try:
+            while True:
+                version, full, aircraft, removed, alerts = fleet.wait_changes(since)
+                changed_at = fleet.changed_at
+                delta = version != since and not full
+                if version == since and not full:
+                    self.wfile.write(b": keepalive\n\n")
+                else:
+                    event = {"full": full, "aircraft": aircraft, "removed": removed, "alerts": alerts}
+                    self.wfile.write(b"data: " + to_json(event) + b"\n\n")
+                    since = version
+                self.wfile.flush()
+                if delta:
+                    # Time from the newest change in this delta until it was sent
+                    fleet.pushed(changed_at)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def replay_capture(replay):
+    print(f"Replaying {replay.path}...")
+    replay.run(fleet.ingest_packet)
+    print(replay.summary())
+
+
+def serve_threaded(http_port, udp_port, capture=None, replay=None):
+    if replay is not None:
+        threading.Thread(target=replay_capture, args=(replay,), daemon=True).start()
+    else:
+        threading.Thread(target=udp_listener, args=(udp_port, capture), daemon=True).start()
+
+    print(f"Web server running at http://localhost:{http_port}")
+
+    # One thread per connection, so open /stream clients do not block others
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    socketserver.ThreadingTCPServer.daemon_threads = True
+    server = socketserver.ThreadingTCPServer(("", http_port), Handler)
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TrajPlot web server")
+    parser.add_argument("--mode", choices=["threaded", "asyncio"], default="threaded",
+                        help="threaded: one thread per client (default); "
+                             "asyncio: UDP ingest and all clients on one event loop")
+    parser.add_argument("--port", type=int, default=8000, help="HTTP port")
+    parser.add_argument("--udp-port", type=int, default=49005)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--record", metavar="FILE", help="also write every received packet to a capture file")
+    source.add_argument("--replay", metavar="FILE", help="play a capture back instead of listening on UDP")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="replay speed factor, 0 = as fast as ingest goes (default 1)")
+    parser.add_argument("--fanout", type=int, default=1,
+                        help="replay every aircraft as this many aircraft, side by side")
+    parser.add_argument("--loop", action="store_true", help="replay the capture over and over")
+    parser.add_argument("--history", type=float, default=60.0, metavar="MINUTES",
+                        help="minutes of full-resolution track kept per aircraft for /trail and /export (default 60)")
+    parser.add_argument("--geofences", metavar="FILE", help="JSON geofences to raise enter/exit alerts for")
+    args = parser.parse_args()
+    if not args.history > 0:
+        parser.error("--history must be positive")
+    fleet.history = max(int(args.history * FIXES_PER_MINUTE), 1)
+
+    try:
+        capture = CaptureWriter(args.record) if args.record else None
+        replay = Replay(args.replay, args.speed, args.fanout, args.loop) if args.replay else None
+        if args.geofences:
+            fleet.geofences = load_geofences(args.geofences)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    # SIGTERM unwinds like Ctrl+C, so a capture is flushed and closed either way
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        if args.mode == "asyncio":
+            from trajplot.aioserver import serve
+            directory = os.path.dirname(os.path.abspath(__file__))
+            asyncio.run(serve(fleet, args.port, args.udp_port, directory, capture, replay))
+        else:
+            serve_threaded(args.port, args.udp_port, capture, replay)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if capture is not None:
+            capture.close()
+            print(f"Recorded {capture.packets} packets to {capture.path}")
 
-PORT = 8000
-print(f"Web server running at http://localhost:{PORT}")
 
-socketserver.TCPServer.allow_reuse_address = True
-server = socketserver.TCPServer(("", PORT), Handler)
-server.serve_forever()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+A legacy JSON packet (no "time", no "alt") must come out of /trail, /data
+and /stream as valid JSON in both server modes: browsers reject NaN.
+
+    python -m unittest discover TrajPlot/tests
+"""
+
+import asyncio
+import http.client
+import json
+import os
+import socketserver
+import sys
+import threading
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(HERE), os.path.dirname(os.path.dirname(HERE))]
+
+import server  # noqa: E402
+from trajplot.aioserver import AsyncServer  # noqa: E402
+from trajplot.fleet import Fleet  # noqa: E402
+
+PACKET = json.dumps({"lat": 47.0, "lon": 8.0, "heading": 90.0, "status": "ON"}).encode()
+SENDER = ("192.0.2.1", 50000)
+
+
+def strict_json(body):
+    """json.loads that fails on NaN and Infinity, like JSON.parse."""
+    def reject(token):
+        raise ValueError(f"invalid JSON token {token}")
+    return json.loads(body, parse_constant=reject)
+
+
+def get(port, path):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    try:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        if path == "/stream":
+            return response.status, response.readline() + response.readline()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+
+class LegacyTrailTest(unittest.TestCase):
+    def setUp(self):
+        self.fleet = Fleet(history=100, timeout=3600.0)
+        self.fleet.ingest_packet(PACKET, SENDER)
+        self.key = next(iter(self.fleet.tracks))
+
+    def check(self, port):
+        status, body = get(port, f"/trail?id={self.key}")
+        self.assertEqual(status, 200)
+        trail = strict_json(body)
+        self.assertEqual(len(trail["points"]), 1)
+        lat, lon, alt, t = trail["points"][0]
+        self.assertEqual((lat, lon, alt, t), (47.0, 8.0, None, None))
+
+        status, body = get(port, "/data")
+        self.assertEqual(status, 200)
+        strict_json(body)
+
+        status, line = get(port, "/stream")
+        self.assertEqual(status, 200)
+        self.assertTrue(line.startswith(b"data: "))
+        strict_json(line[len(b"data: "):])
+
+    def test_threaded(self):
+        fleet, server.fleet = server.fleet, self.fleet
+        handler = type("Handler", (server.Handler,), {"log_message": lambda self, *args: None})
+        httpd = socketserver.ThreadingTCPServer(("127.0.0.1", 0), handler)
+        httpd.daemon_threads = True
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        try:
+            self.check(httpd.server_address[1])
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+            server.fleet = fleet
+
+    def test_asyncio(self):
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        holder = {}
+
+        async def start():
+            app = AsyncServer(self.fleet, os.path.dirname(HERE))
+            holder["server"] = await asyncio.start_server(app.handle, "127.0.0.1", 0)
+            ready.set()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(start())
+            loop.run_forever()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        ready.wait(5)
+        try:
+            self.check(holder["server"].sockets[0].getsockname()[1])
+        finally:
+            async def stop():
+                holder["server"].close()
+                tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                loop.stop()
+
+            asyncio.run_coroutine_threadsafe(stop(), loop)
+            thread.join(5)
+            loop.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+"""
+A capture holding malformed datagrams replays like the live UDP path:
+the bad packets are dropped and counted, the rest still arrive.
+
+    python -m unittest discover TrajPlot/tests
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(HERE), os.path.dirname(os.path.dirname(HERE))]
+
+from trajplot.capture import CaptureWriter, Replay  # noqa: E402
+from trajplot.fleet import Fleet  # noqa: E402
+
+SENDER = ("192.0.2.1", 50000)
+GOOD = json.dumps({"lat": 47.0, "lon": 8.0, "alt": 500.0, "heading": 90.0, "status": "ON"}).encode()
+BAD = [b"[1,2]", b'"x"', b"null", b'{"lat": null}', b'{"lat": [1]}', b'{"id": {}}', b"{oops", b""]
+
+
+class ReplayTest(unittest.TestCase):
+    def test_bad_packets_are_dropped(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "bad.tpcap")
+            writer = CaptureWriter(path)
+            for packet in BAD + [GOOD]:
+                writer.write(packet, SENDER)
+            writer.close()
+
+            fleet = Fleet(history=100, timeout=3600.0)
+            replay = Replay(path, speed=0)
+            self.assertEqual(replay.run(fleet.ingest_packet), len(BAD) + 1)
+
+        self.assertEqual(len(fleet.tracks), 1)
+        counters = fleet.profiler.snapshot()["counters"]
+        self.assertEqual(counters["bad_packets"], len(BAD))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,5 @@
+"""
+Support package for TrajPlot, shared by the X-Plane plugin (PI_TrajPlot.py)
+and the web server (server.py). Copy this folder next to PI_TrajPlot.py in
+Resources/plugins/PythonPlugins.
+"""
@@ -0,0 +1,166 @@
+"""
+Single event-loop TrajPlot server (python server.py --mode asyncio).
+
+UDP ingest runs as a DatagramProtocol and HTTP/SSE clients as stream
+handlers on the same asyncio loop, so a slow browser only ever waits on its
+own socket and no thread shares the Fleet with another.
+"""
+
+import asyncio
+from urllib.parse import urlsplit
+
+from .api import get_json, get_export, to_json
+from .assets import AssetCache
+
+KEEPALIVE = 15.0
+_REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+class TelemetryProtocol(asyncio.DatagramProtocol):
+    def __init__(self, fleet, capture=None):
+        self.fleet = fleet
+        self.capture = capture
+
+    def datagram_received(self, data, addr):
+        if self.capture is not None:
+            self.capture.write(data, addr)
+        try:
+            for key in self.fleet.ingest_packet(data, addr):
+                print(f"Plugin stopped — data reset ({key}).")
+        except Exception:
+            pass
+
+
+class AsyncServer:
+    def __init__(self, fleet, directory):
+        self.fleet = fleet
+        self.directory = directory
+        self.assets = AssetCache(directory)
+        self.changed = asyncio.Event()
+        fleet.on_change = self.notify
+
+    def notify(self):
+        # Wake every stream waiting on the current event, then start a new one
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    async def handle(self, reader, writer):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            lines = head.decode("latin-1").split("\r\n")
+            method, target, _ = lines[0].split(" ", 2)
+            url = urlsplit(target)
+            if method == "HEAD":
+                return await self.send_asset(writer, url.path, lines[1:], head=True)
+            if method != "GET":
+                return await self.respond(writer, 405, "text/plain", b"Method not allowed")
+            try:
+                data = get_json(self.fleet, url.path, url.query)
+                export = get_export(self.fleet, url.query) if url.path == "/export" else None
+            except KeyError:
+                return await self.respond(writer, 404, "text/plain", b"Unknown aircraft")
+            except ValueError:
+                return await self.respond(writer, 400, "text/plain", b"Bad query")
+
+            if data is not None:
+                await self.respond(writer, 200, "application/json", to_json(data))
+            elif export is not None:
+                await self.send_export(writer, *export)
+            elif url.path == "/stream":
+                await self.stream(writer)
+            else:
+                await self.send_asset(writer, url.path, lines[1:])
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, ctype, body):
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {ctype}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+    async def send_asset(self, writer, path, lines, head=False):
+        asset = self.assets.get(path)
+        if asset is None:
+            return await self.respond(writer, 404, "text/plain", b"Not found")
+        headers = {}
+        for line in lines:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        status, fields, body = asset.response(headers.get("if-none-match"), headers.get("accept-encoding"))
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS[status]}\r\n".encode("latin-1")
+            + "".join(f"{name}: {value}\r\n" for name, value in fields).encode("latin-1")
+            + b"Connection: close\r\n\r\n"
+            + (b"" if head else body)
+        )
+        await writer.drain()
+
+    async def send_export(self, writer, name, ctype, body):
+        writer.write(
+            "HTTP/1.1 200 OK\r\n"
+            f"Content-Type: {ctype}\r\n"
+            f'Content-Disposition: attachment; filename="{name}"\r\n'
+            "Connection: close\r\n\r\n".encode("latin-1")
+        )
+        # Formatting and compressing a chunk is CPU work; keep it off the
+        # loop so UDP ingest and the streams carry on meanwhile.
+        loop = asyncio.get_running_loop()
+        while True:
+            piece = await loop.run_in_executor(None, next, body, None)
+            if piece is None:
+                break
+            writer.write(piece)
+            await writer.drain()
+
+    async def stream(self, writer):
+        writer.write(b"HTTP/1.1 200 OK\r\n"
+                     b"Content-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\n"
+                     b"Connection: keep-alive\r\n\r\n")
+        since = 0
+        while True:
+            changed = self.changed
+            changed_at = self.fleet.changed_at
+            version, full, aircraft, removed, alerts = self.fleet.changes(since)
+            delta = version != since and not full
+            if version != since or full:
+                event = {"full": full, "aircraft": aircraft, "removed": removed, "alerts": alerts}
+                writer.write(b"data: " + to_json(event) + b"\n\n")
+                since = version
+            await writer.drain()
+            if delta:
+                # Time from the newest change in this delta until it was sent
+                self.fleet.pushed(changed_at)
+            try:
+                await asyncio.wait_for(changed.wait(), KEEPALIVE)
+            except asyncio.TimeoutError:
+                writer.write(b": keepalive\n\n")
+
+
+async def serve(fleet, http_port, udp_port, directory, capture=None, replay=None):
+    """Serve HTTP; take packets from UDP (written to `capture` if given) or from a capture Replay."""
+    loop = asyncio.get_running_loop()
+    server = AsyncServer(fleet, directory)
+
+    if replay is not None:
+        async def play():
+            await replay.run_async(fleet.ingest_packet)
+            print(replay.summary())
+
+        task = loop.create_task(play())
+        print(f"Replaying {replay.path}...")
+    else:
+        await loop.create_datagram_endpoint(lambda: TelemetryProtocol(fleet, capture),
+                                            local_addr=("0.0.0.0", udp_port))
+        print(f"Listening for TrajPlot data on UDP port {udp_port}...")
+
+    http = await asyncio.start_server(server.handle, "", http_port)
+    print(f"Web server running at http://localhost:{http_port} (asyncio)")
+    async with http:
+        await http.serve_forever()
@@ -0,0 +1,116 @@
+"""
+JSON and export endpoints shared by the threaded and asyncio TrajPlot servers.
+"""
+
+import json
+import math
+import re
+from urllib.parse import parse_qs
+
+from xpcommon.export import FORMATS, chunked, iter_export
+
+EXPORT_COLUMNS = ["fix", "time", "lat", "lon", "alt", "heading"]
+CONTENT_TYPES = {"csv": "text/csv", "colz": "application/zip"}
+# Half the earth's circumference
+MAX_RADIUS = 20_000_000.0
+
+
+def to_json(data):
+    """
+    UTF-8 JSON body of `data`. Missing values are NaN inside the server
+    (legacy JSON packets carry no time, often no altitude), which JSON
+    cannot hold; they are sent as null.
+    """
+    body = json.dumps(data)
+    if "NaN" in body or "Infinity" in body:
+        body = json.dumps(_finite(data), allow_nan=False)
+    return body.encode()
+
+
+def _finite(value):
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {k: _finite(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(v) for v in value]
+    return value
+
+
+def get_json(fleet, path, query):
+    """
+    Body for a JSON GET endpoint, or None if `path` is not one. Raises
+    KeyError for an unknown aircraft id and ValueError for bad parameters.
+    """
+    query = parse_qs(query)
+    key = query["id"][0] if "id" in query else None
+
+    if path == "/data":
+        # /data -> every aircraft, /data?id=<key> -> one aircraft
+        return fleet.snapshot(key)
+
+    if path == "/trail":
+        # /trail -> every full trail, /trail?id=<key>&since=<fix> -> delta,
+        # &zoom=<map zoom> -> whole trail simplified for display
+        since = int(query["since"][0]) if "since" in query else 0
+        zoom = min(max(int(query["zoom"][0]), 0), 24) if "zoom" in query else None
+        trail = fleet.trail(key, since, zoom)
+        if trail is None:
+            raise KeyError(key)
+        return trail
+
+    if path == "/within":
+        # /within?bbox=<south>,<west>,<north>,<east> -> aircraft inside the
+        # box (west > east crosses the antimeridian)
+        south, west, north, east = _floats(query, "bbox", 4)
+        if not -90.0 <= south <= north <= 90.0:
+            raise ValueError("bbox")
+        return fleet.within(south, west, north, east)
+
+    if path == "/near":
+        # /near?lat=<deg>&lon=<deg>&radius=<m> -> aircraft within radius, nearest first
+        lat, = _floats(query, "lat", 1)
+        lon, = _floats(query, "lon", 1)
+        radius, = _floats(query, "radius", 1)
+        if not -90.0 <= lat <= 90.0 or not 0.0 < radius <= MAX_RADIUS:
+            raise ValueError("near")
+        return fleet.near(lat, lon, radius)
+
+    if path == "/geofences":
+        return fleet.fences()
+
+    if path == "/alerts":
+        # /alerts?since=<seq> -> geofence enter/exit alerts numbered after since
+        return fleet.alerts(int(query["since"][0]) if "since" in query else 0)
+
+    if path == "/stats":
+        # Callback timings, queue depths and drop counts of the server and
+        # of every plugin that sent stats
+        return fleet.stats()
+
+    return None
+
+
+def _floats(query, name, count):
+    """`count` comma-separated finite floats of a query parameter, or ValueError."""
+    if name not in query:
+        raise ValueError(name)
+    values = [float(v) for v in query[name][0].split(",")]
+    if len(values) != count or not all(map(math.isfinite, values)):
+        raise ValueError(name)
+    return values
+
+
+def get_export(fleet, query):
+    """
+    (file name, content type, body pieces) for /export?id=<key>&format=csv|colz.
+    The history is copied under the fleet lock; the pieces are produced
+    lazily, chunk by chunk, by whoever sends the response.
+    """
+    query = parse_qs(query)
+    fmt = query["format"][0] if "format" in query else "csv"
+    if fmt not in FORMATS:
+        raise ValueError(fmt)
+    key, columns = fleet.export(query["id"][0] if "id" in query else None)
+    name = re.sub(r"[^\w.-]+", "_", key) + "." + fmt
+    return name, CONTENT_TYPES[fmt], iter_export(fmt, EXPORT_COLUMNS, chunked(columns))
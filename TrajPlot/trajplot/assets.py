@@ -0,0 +1,124 @@
+"""
+In-memory static files for both TrajPlot servers.
+
+Only the files in STATIC are served. Each is read once, gzipped once and
+given a strong ETag (a content hash, one per encoding); requests are
+answered from memory, with 304 Not Modified when the browser's
+If-None-Match already names the current version. The file is stat'ed at
+most once per CHECK_INTERVAL and reloaded when it changed on disk.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import time
+
+# URL path -> file, relative to the server's directory
+STATIC = {"/": "index.html", "/index.html": "index.html"}
+CHECK_INTERVAL = 1.0
+
+
+class Asset:
+    """One static file: its bytes, their gzip and the ETags of both."""
+
+    def __init__(self, path):
+        self.path = path
+        stat = os.stat(path)
+        self.version = (stat.st_mtime_ns, stat.st_size)
+        with open(path, "rb") as f:
+            self.body = f.read()
+        ctype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if ctype.startswith("text/") or ctype in ("application/javascript", "application/json"):
+            ctype += "; charset=utf-8"
+        self.ctype = ctype
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        # mtime=0 keeps the compressed bytes, and so their ETag, reproducible
+        packed = gzip.compress(self.body, 9, mtime=0)
+        self.gzip = packed if len(packed) < len(self.body) else None
+        self.gzip_etag = f'"{digest}-gz"'
+        self.checked = time.monotonic()
+
+    def response(self, if_none_match=None, accept_encoding=None):
+        """(status, headers, body) for a GET with these request headers."""
+        use_gzip = self.gzip is not None and accepts_gzip(accept_encoding)
+        body, etag = (self.gzip, self.gzip_etag) if use_gzip else (self.body, self.etag)
+        headers = [("ETag", etag), ("Cache-Control", "no-cache"), ("Vary", "Accept-Encoding")]
+        if if_none_match and matches(if_none_match, (self.etag, self.gzip_etag)):
+            return 304, headers, b""
+        headers.append(("Content-Type", self.ctype))
+        if use_gzip:
+            headers.append(("Content-Encoding", "gzip"))
+        headers.append(("Content-Length", str(len(body))))
+        return 200, headers, body
+
+
+def accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding header allows gzip (q=0 refuses it)."""
+    if not accept_encoding:
+        return False
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            params = params.strip().lower()
+            if params.startswith("q="):
+                try:
+                    return float(params[2:]) > 0
+                except ValueError:
+                    return False
+            return True
+    return False
+
+
+def matches(if_none_match, etags):
+    """Whether an If-None-Match header names one of `etags` (weak validators compare too)."""
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag in etags:
+            return True
+    return False
+
+
+class AssetCache:
+    """The STATIC files of `directory`, loaded at construction and reloaded when changed."""
+
+    def __init__(self, directory, files=STATIC, interval=CHECK_INTERVAL):
+        self.directory = directory
+        self.files = dict(files)
+        self.interval = interval
+        self.assets = {}  # file name -> Asset
+        for name in set(self.files.values()):
+            self._load(name)
+
+    def _load(self, name):
+        try:
+            self.assets[name] = Asset(os.path.join(self.directory, name))
+        except OSError:
+            self.assets.pop(name, None)
+        return self.assets.get(name)
+
+    def get(self, path):
+        """Asset for a URL path, or None if it is not allowed or not on disk."""
+        name = self.files.get(path)
+        if name is None:
+            return None
+        asset = self.assets.get(name)
+        now = time.monotonic()
+        if asset is not None and now - asset.checked < self.interval:
+            return asset
+        # Swapping the dict entry is atomic, so threaded handlers may race
+        # here at worst into loading the same file twice
+        try:
+            stat = os.stat(os.path.join(self.directory, name))
+        except OSError:
+            self.assets.pop(name, None)
+            return None
+        if asset is None or (stat.st_mtime_ns, stat.st_size) != asset.version:
+            return self._load(name)
+        asset.checked = now
+        return asset
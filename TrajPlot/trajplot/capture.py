@@ -0,0 +1,180 @@
+"""
+Raw UDP captures for the TrajPlot server, and their replay.
+
+A capture is every datagram the server received, as it arrived:
+
+    header  "TPCAP" + version byte + 2 pad
+    packet  float64 seconds since the capture started, 4-byte IPv4
+            sender address, uint16 sender port, uint16 length, then the
+            datagram itself
+
+Packets are only appended, so a capture cut short loses at most its last
+packet. Replay feeds a capture back into Fleet.ingest_packet at recorded
+speed, N times faster or as fast as ingest goes, optionally as many
+aircraft at once (a repeatable load generator).
+"""
+
+import asyncio
+import math
+import socket
+import struct
+import time
+
+from xpcommon.profiler import STATS_MAGIC
+
+from . import protocol
+
+MAGIC = b"TPCAP"
+VERSION = 1
+HEADER = struct.Struct("<5sB2x")
+PACKET = struct.Struct("<d4sHH")
+
+# Fan-out copies are spread over a grid this many degrees apart
+SPACING = 0.02
+
+
+class CaptureWriter:
+    """Appends received datagrams to a capture file (buffered; flushed about once a second)."""
+
+    def __init__(self, path, clock=time.monotonic):
+        self.path = path
+        self.clock = clock
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION))
+        self.start = clock()
+        self.flushed = self.start
+        self.packets = 0
+
+    def write(self, packet, addr):
+        now = self.clock()
+        try:
+            host = socket.inet_aton(addr[0])
+        except OSError:
+            host = bytes(4)
+        self.file.write(PACKET.pack(now - self.start, host, addr[1], len(packet)))
+        self.file.write(packet)
+        self.packets += 1
+        if now - self.flushed >= 1.0:
+            self.file.flush()
+            self.flushed = now
+
+    def close(self):
+        self.file.close()
+
+
+def read_capture(path):
+    """Yield (seconds, datagram, (host, port)) for every complete packet of a capture."""
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size or HEADER.unpack(header) != (MAGIC, VERSION):
+            raise ValueError(f"{path} is not a TrajPlot capture")
+        while True:
+            head = f.read(PACKET.size)
+            if len(head) < PACKET.size:
+                return
+            t, host, port, size = PACKET.unpack(head)
+            packet = f.read(size)
+            if len(packet) < size:
+                return  # torn tail
+            yield t, packet, (socket.inet_ntoa(host), port)
+
+
+class Replay:
+    """
+    Plays a capture back. `speed` is the time factor (0 = no waiting);
+    with `fanout` N > 1 every packet is also sent as N - 1 more aircraft,
+    each from its own synthetic sender and shifted by a multiple of
+    SPACING degrees, so one recorded flight becomes a formation of N.
+    `loop` starts over at the end of the capture.
+    """
+
+    def __init__(self, path, speed=1.0, fanout=1, loop=False):
+        self.path = path
+        self.speed = speed
+        self.fanout = max(int(fanout), 1)
+        self.loop = loop
+        self.packets = 0
+        self.seconds = 0.0
+        for _ in read_capture(path):
+            break  # a missing or foreign file fails here rather than mid-replay
+        side = math.ceil(math.sqrt(self.fanout))
+        self.offsets = [(SPACING * (i // side), SPACING * (i % side)) for i in range(self.fanout)]
+        # One reused encode buffer per record count
+        self.buffers = {}
+
+    def copies(self, packet, addr):
+        """(datagram, sender) of every fan-out copy of a packet; copy 0 is the original."""
+        yield packet, addr
+        if self.fanout == 1 or packet.startswith(STATS_MAGIC):
+            return
+        if packet[:1] == b"{":
+            # Legacy JSON: more senders, same position
+            for i in range(1, self.fanout):
+                yield packet, (f"{addr[0]}#{i}", addr[1])
+            return
+        try:
+            records = list(protocol.iter_records(packet))
+        except ValueError:
+            return
+        size = protocol.RECORD.size
+        buf = self.buffers.get(len(records))
+        if buf is None:
+            buf = self.buffers[len(records)] = bytearray(size * len(records))
+        for i in range(1, self.fanout):
+            dlat, dlon = self.offsets[i]
+            for j, r in enumerate(records):
+                protocol.pack_into(buf, j * size, r[protocol.F_FLAGS], r[protocol.F_SOURCE],
+                                   r[protocol.F_SEQ], r[protocol.F_TIME],
+                                   r[protocol.F_LAT] + dlat, r[protocol.F_LON] + dlon,
+                                   r[protocol.F_ALT], r[protocol.F_HEADING])
+            yield bytes(buf), (f"{addr[0]}#{i}", addr[1])
+
+    def schedule(self):
+        """Yield (seconds after replay start, datagram, sender) in order."""
+        base = 0.0
+        while True:
+            last = 0.0
+            for t, packet, addr in read_capture(self.path):
+                last = t
+                due = (base + t) / self.speed if self.speed > 0 else 0.0
+                for copy in self.copies(packet, addr):
+                    yield (due,) + copy
+            if not self.loop:
+                return
+            base += last + 1.0
+
+    def run(self, ingest, clock=time.monotonic, sleep=time.sleep):
+        """Replay into ingest(datagram, sender) on this thread; returns the packets sent."""
+        start = clock()
+        for due, packet, addr in self.schedule():
+            delay = start + due - clock()
+            if delay > 0:
+                sleep(delay)
+            self._ingest(ingest, packet, addr)
+        self.seconds = clock() - start
+        return self.packets
+
+    async def run_async(self, ingest, clock=time.monotonic):
+        """run() for an event loop: waits with asyncio.sleep and yields every 256 packets at full speed."""
+        start = clock()
+        for due, packet, addr in self.schedule():
+            delay = start + due - clock()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif self.packets % 256 == 0:
+                await asyncio.sleep(0)
+            self._ingest(ingest, packet, addr)
+        self.seconds = clock() - start
+        return self.packets
+
+    def _ingest(self, ingest, packet, addr):
+        self.packets += 1
+        try:
+            ingest(packet, addr)
+        except Exception:
+            # Dropped like a bad datagram on the live UDP path
+            pass
+
+    def summary(self):
+        rate = self.packets / self.seconds if self.seconds > 0 else float("inf")
+        return f"Replayed {self.packets} packets in {self.seconds:.1f} s ({rate:,.0f} packets/s)"
@@ -0,0 +1,344 @@
+"""
+Per-source aircraft state for the TrajPlot server.
+"""
+
+import threading
+import time
+from array import array
+from collections import OrderedDict, deque
+
+from xpcommon.profiler import Profiler, parse_packet
+
+from .history import TrackHistory
+from .protocol import iter_records, to_dict, F_FLAGS, FLAG_ON, F_SOURCE, F_TIME, F_LAT, F_LON, F_ALT, F_HEADING
+from .simplify import Gate, simplify
+from .spatial import GridIndex, Geofences
+
+
+class Track:
+    __slots__ = ("key", "record", "last_seen", "history", "version",
+                 "gate", "display", "vertex", "simplified")
+
+    def __init__(self, key, history, gating):
+        self.key = key
+        self.record = None
+        self.last_seen = 0.0
+        self.history = TrackHistory(history)  # every fix, full resolution
+        self.version = 0
+        self.gate = Gate(*gating)
+        self.display = TrackHistory(history)  # fixes that passed the gate
+        self.vertex = False  # whether the newest fix passed the gate
+        self.simplified = (None, None)  # (zoom, display.count) -> points cache
+
+
+# Plugin stats older than this are no longer reported by /stats
+STATS_TIMEOUT = 300.0
+
+
+def _moved(old, new):
+    return (old is None or old[F_LAT] != new[F_LAT] or old[F_LON] != new[F_LON]
+            or old[F_ALT] != new[F_ALT] or old[F_HEADING] != new[F_HEADING])
+
+
+class Fleet:
+    """
+    Latest record and bounded trajectory history of every aircraft feeding
+    the server, keyed by "<host>:<port>/<source id>".
+
+    Tracks live in an OrderedDict kept in last-seen order, so lookups are
+    O(1) and evicting sources that went quiet for `timeout` seconds only
+    ever looks at the stalest entries. All access goes through one lock:
+    the UDP listener writes while HTTP handler threads read.
+
+    Every visible change (a track moved, appeared or was removed) bumps
+    `version`, wakes the threads waiting in wait_changes() and calls the
+    optional `on_change` hook (used by the asyncio server).
+    Packets that repeat the previous position only refresh last_seen, so a
+    parked aircraft produces no pushes.
+
+    Next to the full-resolution history each track keeps the fixes that
+    pass a distance/turn Gate; trail(zoom=...) serves those thinned again
+    by Douglas-Peucker for the map, so the vertex count stays roughly
+    constant however long the flight.
+
+    The latest position of every track is kept in a GridIndex for box and
+    radius queries (within(), near()), and every moved fix is checked
+    against the `geofences`; entering or leaving one records an alert,
+    served by alerts() and carried by the change stream.
+
+    Stats datagrams (xpcommon.profiler) arriving on the same port are kept
+    per sender and served by stats() with the server's own ingest timings
+    and the push latency the streams report through pushed().
+    """
+
+    def __init__(self, history=3600, timeout=30.0, min_gap=10.0, max_gap=1000.0, min_turn=2.0,
+                 geofences=None):
+        self.history = history
+        self.timeout = timeout
+        self.gating = (min_gap, max_gap, min_turn)
+        self.tracks = OrderedDict()
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.version = 0
+        self.removed = deque(maxlen=1024)  # (version, key)
+        self.removed_floor = 0  # removals at or below this version were forgotten
+        self.on_change = None
+        self.index = GridIndex()
+        self.geofences = geofences if geofences is not None else Geofences()
+        self.alert_log = deque(maxlen=1024)  # (version, alert)
+        self.alert_seq = 0
+        self.plugins = {}  # "<host>:<port>/<name>" -> (last seen, stats)
+        self.profiler = Profiler("server")
+        self.ingest_probe = self.profiler.probe("ingest_packet")
+        self.push_probe = self.profiler.probe("push")
+        self.changed_at = 0  # perf_counter_ns() of the latest change
+        self.profiler.count("packets", 0)
+        self.profiler.count("bad_packets", 0)
+        self.profiler.gauge("aircraft", 0)
+
+    @staticmethod
+    def key(addr, source):
+        return f"{addr[0]}:{addr[1]}/{source}"
+
+    def ingest(self, record, addr, now=None):
+        now = time.monotonic() if now is None else now
+        key = self.key(addr, record[F_SOURCE])
+        with self.lock:
+            track = self.tracks.get(key)
+            if track is None:
+                track = self.tracks[key] = Track(key, self.history, self.gating)
+            else:
+                self.tracks.move_to_end(key)
+            moved = _moved(track.record, record)
+            track.record = record
+            track.last_seen = now
+            if moved:
+                fix = (record[F_TIME], record[F_LAT], record[F_LON], record[F_ALT], record[F_HEADING])
+                track.history.append(*fix)
+                track.vertex = track.gate.accept(record[F_LAT], record[F_LON], record[F_HEADING])
+                if track.vertex:
+                    track.display.append(*fix)
+                self.version += 1
+                track.version = self.version
+                self._locate(key, record)
+                self._notify()
+            self._evict(now)
+        return track
+
+    def _locate(self, key, record):
+        lat, lon = record[F_LAT], record[F_LON]
+        self.index.update(key, lat, lon)
+        for fence, event in self.geofences.check(key, lat, lon):
+            self.alert_seq += 1
+            self.alert_log.append((self.version, {
+                "seq": self.alert_seq, "time": time.time(), "id": key, "fence": fence.name,
+                "event": event, "lat": lat, "lon": lon, "alt": record[F_ALT],
+            }))
+
+    def ingest_packet(self, packet, addr):
+        """Apply every record of a datagram; returns the keys an OFF record removed."""
+        self.profiler.count("packets")
+        dropped = []
+        with self.ingest_probe:
+            try:
+                stats = parse_packet(packet)
+                if stats is not None:
+                    key = self.key(addr, stats.get("name", "plugin"))
+                    with self.lock:
+                        self.plugins[key] = (time.monotonic(), stats)
+                    return dropped
+                for record in iter_records(packet):
+                    if record[F_FLAGS] & FLAG_ON:
+                        self.ingest(record, addr)
+                    else:
+                        # Plugin OFF signal: forget that aircraft
+                        key = self.key(addr, record[F_SOURCE])
+                        if self.drop(key):
+                            dropped.append(key)
+            except ValueError:
+                self.profiler.count("bad_packets")
+                raise
+        return dropped
+
+    def drop(self, key):
+        with self.lock:
+            return self._remove(key)
+
+    def _remove(self, key):
+        if self.tracks.pop(key, None) is None:
+            return False
+        self.index.remove(key)
+        self.geofences.forget(key)
+        self.version += 1
+        if len(self.removed) == self.removed.maxlen:
+            self.removed_floor = self.removed[0][0]
+        self.removed.append((self.version, key))
+        self._notify()
+        return True
+
+    def _notify(self):
+        self.changed_at = time.perf_counter_ns()
+        self.changed.notify_all()
+        if self.on_change is not None:
+            self.on_change()
+
+    def evict(self, now=None):
+        with self.lock:
+            self._evict(time.monotonic() if now is None else now)
+
+    def _evict(self, now):
+        tracks = self.tracks
+        while tracks:
+            key, track = next(iter(tracks.items()))
+            if now - track.last_seen < self.timeout:
+                break
+            self._remove(key)
+
+    def snapshot(self, key=None):
+        """All aircraft as a JSON-ready dict, or a single one in the legacy /data shape."""
+        self.evict()
+        with self.lock:
+            if key is not None:
+                track = self.tracks.get(key)
+                return to_dict(track.record) if track is not None else {"status": "OFF"}
+            aircraft = [self._entry(t) for t in self.tracks.values()]
+        return {"status": "ON" if aircraft else "OFF", "aircraft": aircraft}
+
+    @staticmethod
+    def _entry(track):
+        # "fix" is the number of the newest trail point, the /trail cursor;
+        # "vertex" tells the map whether to keep it in the displayed trail
+        return dict(to_dict(track.record), id=track.key, fix=track.history.count,
+                    vertex=track.vertex)
+
+    def trail(self, key=None, since=0, zoom=None):
+        """
+        Trail points newer than fix `since` for one aircraft, or the full
+        trail of every aircraft when `key` is None. With `zoom` the whole
+        display trail is returned instead, simplified for that map zoom.
+        """
+        with self.lock:
+            if key is not None:
+                track = self.tracks.get(key)
+                if track is None:
+                    return None
+                tracks = [track]
+            else:
+                tracks = list(self.tracks.values())
+                since = 0
+            if zoom is None:
+                trails = [self._trail(t, since) for t in tracks]
+            else:
+                pending = [self._display(t, zoom) for t in tracks]
+        if zoom is not None:
+            # Douglas-Peucker runs outside the lock so ingest is never held up
+            trails = []
+            for track, trail, cache_key, raw in pending:
+                if raw is not None:
+                    trail["points"] = simplify(raw, zoom)
+                    track.simplified = (cache_key, trail["points"])
+                trails.append(trail)
+        return trails[0] if key is not None else {"aircraft": trails}
+
+    @staticmethod
+    def _trail(track, since):
+        points, reset = track.history.since(since)
+        return {"id": track.key, "fix": track.history.count, "reset": reset, "points": points}
+
+    @staticmethod
+    def _display(track, zoom):
+        """(track, trail, cache key, points still to simplify or None if cached)"""
+        cache_key = (zoom, track.display.count)
+        cached_key, points = track.simplified
+        trail = {"id": track.key, "fix": track.history.count, "reset": True, "points": points}
+        if cached_key == cache_key:
+            return track, trail, cache_key, None
+        return track, trail, cache_key, track.display.since(0)[0]
+
+    def within(self, south, west, north, east):
+        """Aircraft inside a lat/lon box, in the /data entry shape."""
+        self.evict()
+        with self.lock:
+            keys = self.index.within(south, west, north, east)
+            return {"aircraft": [self._entry(self.tracks[k]) for k in keys]}
+
+    def near(self, lat, lon, radius):
+        """Aircraft within `radius` metres, nearest first, with their "distance"."""
+        self.evict()
+        with self.lock:
+            found = self.index.near(lat, lon, radius)
+            return {"aircraft": [dict(self._entry(self.tracks[k]), distance=round(d, 1)) for d, k in found]}
+
+    def fences(self):
+        """Every geofence and the aircraft inside it."""
+        with self.lock:
+            members = self.geofences.members()
+            return {"fences": [dict(f.to_dict(), inside=members[f.name]) for f in self.geofences.fences]}
+
+    def alerts(self, since=0):
+        """Geofence alerts numbered after `since` that are still held, oldest first."""
+        with self.lock:
+            return {"seq": self.alert_seq, "alerts": [a for _, a in self.alert_log if a["seq"] > since]}
+
+    def export(self, key=None):
+        """
+        (key, columns) of one aircraft's full-resolution history for export,
+        copied so it can be written out without holding the lock. `key` may
+        be omitted while only one aircraft is tracked. The first column is
+        the fix number, so an export that starts above fix 1 shows that the
+        older fixes no longer fit the history.
+        """
+        with self.lock:
+            if key is None:
+                if len(self.tracks) != 1:
+                    raise ValueError("id required")
+                track = next(iter(self.tracks.values()))
+            else:
+                track = self.tracks[key]
+            history = track.history
+            fixes = array("q", range(history.first, history.count + 1))
+            return track.key, [fixes] + history.columns()
+
+    def stats(self):
+        """Server ingest stats and the latest stats of every plugin heard from recently."""
+        now = time.monotonic()
+        with self.lock:
+            for key in [k for k, (seen, _) in self.plugins.items() if now - seen > STATS_TIMEOUT]:
+                del self.plugins[key]
+            plugins = [dict(stats, id=key, age=round(now - seen, 1))
+                       for key, (seen, stats) in self.plugins.items()]
+            self.profiler.gauge("aircraft", len(self.tracks))
+        return {"server": self.profiler.snapshot(), "plugins": plugins}
+
+    def changes(self, since):
+        """
+        Fleet delta after version `since`, as (version, full, aircraft,
+        removed, alerts): the tracks that changed, the keys that
+        disappeared and the geofence alerts raised meanwhile. `full` means
+        the caller is too far behind for a delta (or new) and `aircraft` is
+        the whole fleet; it comes without alerts.
+        """
+        with self.lock:
+            self._evict(time.monotonic())
+            full = since == 0 or since < self.removed_floor
+            aircraft = [self._entry(t) for t in self.tracks.values()
+                        if full or t.version > since]
+            removed = [] if full else [key for v, key in self.removed if v > since]
+            alerts = []
+            if not full:
+                for v, alert in reversed(self.alert_log):
+                    if v <= since:
+                        break
+                    alerts.append(alert)
+                alerts.reverse()
+            return self.version, full, aircraft, removed, alerts
+
+    def pushed(self, changed_at):
+        """A stream finished writing a delta read after the change stamped `changed_at`."""
+        self.push_probe.add(time.perf_counter_ns() - changed_at)
+
+    def wait_changes(self, since, timeout=15.0):
+        """Block (threaded server) until the fleet changes after `since`, then return changes()."""
+        with self.changed:
+            self.changed.wait_for(lambda: self.version != since, timeout)
+        return self.changes(since)
@@ -0,0 +1,77 @@
+"""
+Compact per-aircraft trajectory history for the TrajPlot server.
+"""
+
+from array import array
+
+
+class TrackHistory:
+    """
+    Fixed-capacity ring of position fixes kept in parallel array('d')
+    columns (40 bytes per fix instead of a tuple of floats). The columns
+    grow as fixes arrive, so a short flight only takes what it uses, and
+    wrap around once `capacity` fixes are held.
+
+    Fixes are numbered 1, 2, 3, ... in arrival order; `count` is the number
+    of the newest fix. since(n) returns only the fixes newer than fix n that
+    are still held, which is what /trail?since=<n> serves to clients.
+    """
+
+    __slots__ = ("capacity", "count", "time", "lat", "lon", "alt", "heading")
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.count = 0
+        self.time = array("d")
+        self.lat = array("d")
+        self.lon = array("d")
+        self.alt = array("d")
+        self.heading = array("d")
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def first(self):
+        """Number of the oldest fix still held (count + 1 when empty)."""
+        return self.count - len(self) + 1
+
+    def append(self, t, lat, lon, alt, heading):
+        if self.count < self.capacity:
+            self.time.append(t)
+            self.lat.append(lat)
+            self.lon.append(lon)
+            self.alt.append(alt)
+            self.heading.append(heading)
+            self.count += 1
+            return
+        i = self.count % self.capacity
+        self.time[i] = t
+        self.lat[i] = lat
+        self.lon[i] = lon
+        self.alt[i] = alt
+        self.heading[i] = heading
+        self.count += 1
+
+    def columns(self):
+        """Copies of the time, lat, lon, alt and heading columns, oldest fix first."""
+        n = len(self)
+        split = self.count % self.capacity if n == self.capacity else 0
+        return [c[split:n] + c[:split] for c in (self.time, self.lat, self.lon, self.alt, self.heading)]
+
+    def since(self, fix):
+        """
+        Fixes newer than `fix` as ([[lat, lon, alt, time], ...], reset).
+        `reset` is True when the caller's cursor is older than anything held
+        (or 0), i.e. the points replace its trail rather than extend it.
+        """
+        first = self.first
+        reset = fix < first - 1 or fix <= 0
+        start = max(fix + 1, first)
+        cap = self.capacity
+        lat, lon, alt, t = self.lat, self.lon, self.alt, self.time
+        points = []
+        for n in range(start, self.count + 1):
+            i = (n - 1) % cap
+            points.append([lat[i], lon[i], alt[i], t[i]])
+        return points, reset
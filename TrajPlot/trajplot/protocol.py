@@ -0,0 +1,83 @@
+"""
+TrajPlot UDP wire format.
+
+A binary datagram is one or more fixed-size little-endian records:
+
+    magic    2s   b"TP"
+    version  B    VERSION
+    flags    B    FLAG_ON while the plugin is sending positions
+    source   H    aircraft index on the sending sim (0 = user aircraft)
+    seq      I    per-source sequence number
+    simTime  d    sim time, seconds
+    lat      d    degrees
+    lon      d    degrees
+    alt      d    metres MSL
+    heading  d    degrees true
+
+Records are decoded straight into tuples (see the F_* field indices); no
+dict is built per packet. Legacy JSON packets ({"lat": ..., "status": ...})
+are detected by their leading "{" and converted to the same tuple shape.
+"""
+
+import json
+import math
+import struct
+
+MAGIC = b"TP"
+VERSION = 1
+FLAG_ON = 0x01
+
+RECORD = struct.Struct("<2sBBHId4d")
+
+F_MAGIC, F_VERSION, F_FLAGS, F_SOURCE, F_SEQ, F_TIME, F_LAT, F_LON, F_ALT, F_HEADING = range(10)
+
+NaN = float("nan")
+
+
+def pack_into(buf, offset, flags, source, seq, sim_time, lat, lon, alt, heading):
+    RECORD.pack_into(buf, offset, MAGIC, VERSION, flags, source, seq & 0xFFFFFFFF,
+                     sim_time, lat, lon, alt, heading)
+
+
+def iter_records(packet):
+    """Yield one record tuple per aircraft in `packet`; raises ValueError if malformed."""
+    if packet[:1] == b"{":
+        yield _from_json(json.loads(packet))
+        return
+    if len(packet) % RECORD.size or packet[:2] != MAGIC:
+        raise ValueError("not a TrajPlot packet")
+    for record in RECORD.iter_unpack(packet):
+        if record[F_VERSION] != VERSION:
+            raise ValueError(f"unsupported TrajPlot packet version {record[F_VERSION]}")
+        yield record
+
+
+def _from_json(data):
+    if not isinstance(data, dict):
+        raise ValueError("not a TrajPlot packet")
+    on = data.get("status", "ON") != "OFF"
+    try:
+        return (MAGIC, VERSION, FLAG_ON if on else 0, int(data.get("id", 0)), int(data.get("seq", 0)),
+                float(data.get("time", NaN)),
+                float(data.get("lat", NaN)), float(data.get("lon", NaN)),
+                float(data.get("alt", NaN)), float(data.get("heading", NaN)))
+    except TypeError:
+        # null, list or object where a number belongs
+        raise ValueError("malformed TrajPlot JSON packet") from None
+
+
+def to_dict(record):
+    """JSON-friendly view of a record, in the shape the web client expects."""
+    if not record[F_FLAGS] & FLAG_ON:
+        return {"status": "OFF"}
+    out = {
+        "lat": record[F_LAT],
+        "lon": record[F_LON],
+        "alt": record[F_ALT],
+        "heading": record[F_HEADING],
+        "status": "ON",
+        "seq": record[F_SEQ],
+    }
+    if not math.isnan(record[F_TIME]):
+        out["time"] = record[F_TIME]
+    return out
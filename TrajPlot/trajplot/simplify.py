@@ -0,0 +1,106 @@
+"""
+Trajectory thinning for the TrajPlot map: online gating of incoming fixes
+and zoom-dependent Douglas-Peucker over the gated vertices.
+"""
+
+import math
+
+EARTH_RADIUS = 6371008.8  # m
+# Web Mercator ground resolution at the equator, zoom 0 (m/px)
+EQUATOR_M_PER_PX = 2 * math.pi * 6378137.0 / 256
+# Vertices closer than this to the simplified line are invisible on screen
+TOLERANCE_PX = 1.5
+
+
+def distance(lat1, lon1, lat2, lon2):
+    """Approximate ground distance in metres (equirectangular, fine below ~100 km)."""
+    x = math.radians(lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return EARTH_RADIUS * math.hypot(x, y)
+
+
+def meters_per_pixel(lat, zoom):
+    return EQUATOR_M_PER_PX * math.cos(math.radians(lat)) / 2 ** zoom
+
+
+class Gate:
+    """
+    Decides online which fixes become trail vertices. A fix is kept when
+    the aircraft has moved at least `min_gap` metres and turned by
+    `min_turn` degrees since the last kept vertex, or has moved `max_gap`
+    metres regardless; straight legs therefore cost one vertex per
+    `max_gap` however high the send rate.
+    """
+
+    __slots__ = ("min_gap", "max_gap", "min_turn", "lat", "lon", "heading")
+
+    def __init__(self, min_gap=10.0, max_gap=1000.0, min_turn=2.0):
+        self.min_gap = min_gap
+        self.max_gap = max_gap
+        self.min_turn = min_turn
+        self.lat = None
+        self.lon = None
+        self.heading = None
+
+    def accept(self, lat, lon, heading):
+        if self.lat is not None:
+            moved = distance(self.lat, self.lon, lat, lon)
+            turn = abs((heading - self.heading + 180.0) % 360.0 - 180.0)
+            if moved < self.max_gap and not (moved >= self.min_gap and turn >= self.min_turn):
+                return False
+        self.lat, self.lon, self.heading = lat, lon, heading
+        return True
+
+
+def douglas_peucker(lat, lon, tolerance):
+    """
+    Indices of the points of the polyline (lat, lon sequences) to keep so
+    that no dropped point lies more than `tolerance` metres from it.
+    Iterative, on a local equirectangular projection.
+    """
+    n = len(lat)
+    if n < 3:
+        return list(range(n))
+
+    kx = math.radians(1) * EARTH_RADIUS * math.cos(math.radians(lat[n // 2]))
+    ky = math.radians(1) * EARTH_RADIUS
+    xs = [v * kx for v in lon]
+    ys = [v * ky for v in lat]
+
+    keep = bytearray(n)
+    keep[0] = keep[n - 1] = 1
+    tol2 = tolerance * tolerance
+    stack = [(0, n - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        ax, ay = xs[a], ys[a]
+        dx, dy = xs[b] - ax, ys[b] - ay
+        seg2 = dx * dx + dy * dy
+        worst, worst_d2 = -1, tol2
+        for i in range(a + 1, b):
+            px, py = xs[i] - ax, ys[i] - ay
+            if seg2 > 0.0:
+                # Squared distance to the segment a-b
+                u = min(max((px * dx + py * dy) / seg2, 0.0), 1.0)
+                px -= u * dx
+                py -= u * dy
+            d2 = px * px + py * py
+            if d2 > worst_d2:
+                worst, worst_d2 = i, d2
+        if worst >= 0:
+            keep[worst] = 1
+            stack.append((a, worst))
+            stack.append((worst, b))
+    return [i for i in range(n) if keep[i]]
+
+
+def simplify(points, zoom):
+    """Douglas-Peucker of [[lat, lon, ...], ...] at the tolerance of one map zoom level."""
+    if len(points) < 3:
+        return points
+    lat = [p[0] for p in points]
+    lon = [p[1] for p in points]
+    tolerance = TOLERANCE_PX * meters_per_pixel(lat[len(lat) // 2], zoom)
+    return [points[i] for i in douglas_peucker(lat, lon, tolerance)]
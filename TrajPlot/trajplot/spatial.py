@@ -0,0 +1,263 @@
+"""
+Spatial index and geofences over the latest aircraft positions.
+
+GridIndex buckets every track into a cell of a uniform lat/lon grid and
+moves it only when a fix crosses into another cell, so updates are O(1)
+and box/radius queries only look at the cells they overlap. Geofences are
+bucketed into the same kind of grid, so checking a fix costs one cell
+lookup plus the point tests of the few fences near it.
+
+Geofence file (server.py --geofences FILE):
+
+    {"fences": [
+      {"name": "LSZH CTR", "polygon": [[47.55, 8.40], [47.55, 8.70], [47.35, 8.70], [47.35, 8.40]]},
+      {"name": "LSZH 10 km", "center": [47.4647, 8.5492], "radius": 10000}
+    ]}
+
+Polygons are [lat, lon] vertices, tested on the plain lat/lon plane (no
+antimeridian crossing); circles are a centre and a radius in metres.
+"""
+
+import json
+import math
+
+from .simplify import EARTH_RADIUS
+
+CELL_DEG = 0.5
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Great-circle distance in metres."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((p2 - p1) / 2) ** 2
+         + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS * math.asin(min(math.sqrt(a), 1.0))
+
+
+def radius_box(lat, lon, radius):
+    """(south, west, north, east) enclosing a circle of `radius` metres."""
+    angle = radius / EARTH_RADIUS
+    dlat = math.degrees(angle)
+    south, north = lat - dlat, lat + dlat
+    ratio = math.sin(angle) / math.cos(math.radians(lat)) if abs(lat) < 90.0 else 2.0
+    if south <= -90.0 or north >= 90.0 or angle >= math.pi / 2 or ratio >= 1.0:
+        # Reaches a pole: every longitude
+        return max(south, -90.0), lon - 180.0, min(north, 90.0), lon + 180.0
+    dlon = math.degrees(math.asin(ratio))
+    return south, lon - dlon, north, lon + dlon
+
+
+def _wrap(lon):
+    return (lon + 180.0) % 360.0 - 180.0
+
+
+def _in_box(lat, lon, south, west, north, east):
+    if not south <= lat <= north:
+        return False
+    if east - west >= 360.0:
+        return True
+    west, east = _wrap(west), _wrap(east)
+    return west <= lon <= east if west <= east else lon >= west or lon <= east
+
+
+class Grid:
+    """Uniform lat/lon grid of sets; the cells of a box wrap at the antimeridian."""
+
+    def __init__(self, cell=CELL_DEG):
+        self.cell = cell
+        self.columns = round(360.0 / cell)
+        self.cells = {}
+
+    def key(self, lat, lon):
+        return int((lat + 90.0) // self.cell), int((_wrap(lon) + 180.0) // self.cell) % self.columns
+
+    def span(self, south, west, north, east):
+        """(rows, columns) of the cells overlapping a box."""
+        rows = range(int((south + 90.0) // self.cell), int((north + 90.0) // self.cell) + 1)
+        if east - west >= 360.0:
+            return rows, range(self.columns)
+        first = int((_wrap(west) + 180.0) // self.cell)
+        count = min(int((east - west) // self.cell) + 2, self.columns)
+        return rows, [(first + i) % self.columns for i in range(count)]
+
+    def box(self, south, west, north, east):
+        """Keys of the occupied cells overlapping a box."""
+        rows, columns = self.span(south, west, north, east)
+        if len(rows) * len(columns) > len(self.cells):
+            # Fewer occupied cells than overlapped ones: filter those instead
+            rows, columns = set(rows), set(columns)
+            return [key for key in self.cells if key[0] in rows and key[1] in columns]
+        cells = self.cells
+        return [(r, c) for r in rows for c in columns if (r, c) in cells]
+
+    def add(self, key, item):
+        self.cells.setdefault(key, set()).add(item)
+
+    def discard(self, key, item):
+        items = self.cells.get(key)
+        if items is not None:
+            items.discard(item)
+            if not items:
+                del self.cells[key]
+
+
+class GridIndex:
+    """Latest position of every track, bucketed for box and radius queries."""
+
+    def __init__(self, cell=CELL_DEG):
+        self.grid = Grid(cell)
+        self.positions = {}  # track key -> (lat, lon, cell)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def update(self, item, lat, lon):
+        if lat != lat or lon != lon:
+            self.remove(item)
+            return
+        cell = self.grid.key(lat, lon)
+        old = self.positions.get(item)
+        if old is None or old[2] != cell:
+            if old is not None:
+                self.grid.discard(old[2], item)
+            self.grid.add(cell, item)
+        self.positions[item] = (lat, lon, cell)
+
+    def remove(self, item):
+        old = self.positions.pop(item, None)
+        if old is not None:
+            self.grid.discard(old[2], item)
+
+    def within(self, south, west, north, east):
+        """Keys of the tracks inside a box (west > east crosses the antimeridian)."""
+        if east < west:
+            east += 360.0
+        positions = self.positions
+        found = []
+        for cell in self.grid.box(south, west, north, east):
+            for item in self.grid.cells[cell]:
+                lat, lon, _ = positions[item]
+                if _in_box(lat, lon, south, west, north, east):
+                    found.append(item)
+        return found
+
+    def near(self, lat, lon, radius):
+        """(distance in metres, key) of the tracks within `radius` metres, nearest first."""
+        positions = self.positions
+        found = []
+        for item in self.within(*radius_box(lat, lon, radius)):
+            plat, plon, _ = positions[item]
+            d = haversine(lat, lon, plat, plon)
+            if d <= radius:
+                found.append((d, item))
+        found.sort()
+        return found
+
+
+class Geofence:
+    """A named polygon or circle."""
+
+    def __init__(self, name, polygon=None, center=None, radius=None):
+        self.name = name
+        if polygon is not None:
+            if len(polygon) < 3:
+                raise ValueError(f"geofence {name}: a polygon needs at least 3 points")
+            self.polygon = [(float(lat), float(lon)) for lat, lon in polygon]
+            lats = [p[0] for p in self.polygon]
+            lons = [p[1] for p in self.polygon]
+            self.bbox = (min(lats), min(lons), max(lats), max(lons))
+            self.center = self.radius = None
+        elif center is not None and radius is not None:
+            self.polygon = None
+            self.center = (float(center[0]), float(center[1]))
+            self.radius = float(radius)
+            self.bbox = radius_box(self.center[0], self.center[1], self.radius)
+        else:
+            raise ValueError(f"geofence {name}: needs a \"polygon\" or a \"center\" and \"radius\"")
+
+    def contains(self, lat, lon):
+        if not _in_box(lat, lon, *self.bbox):
+            return False
+        if self.polygon is None:
+            return haversine(lat, lon, *self.center) <= self.radius
+        # Even-odd ray casting
+        inside = False
+        points = self.polygon
+        lat1, lon1 = points[-1]
+        for lat2, lon2 in points:
+            if (lat2 > lat) != (lat1 > lat):
+                if lon < lon1 + (lat - lat1) * (lon2 - lon1) / (lat2 - lat1):
+                    inside = not inside
+            lat1, lon1 = lat2, lon2
+        return inside
+
+    def to_dict(self):
+        if self.polygon is None:
+            return {"name": self.name, "center": list(self.center), "radius": self.radius}
+        return {"name": self.name, "polygon": [list(p) for p in self.polygon]}
+
+
+class Geofences:
+    """
+    Geofence rules and which of them every track is inside. check() runs
+    once per fix and returns the fences entered and exited since the
+    previous fix of that track.
+    """
+
+    def __init__(self, fences=(), cell=CELL_DEG):
+        self.fences = list(fences)
+        self.grid = Grid(cell)
+        for i, fence in enumerate(self.fences):
+            rows, columns = self.grid.span(*fence.bbox)
+            for r in rows:
+                for c in columns:
+                    self.grid.add((r, c), i)
+        self.inside = {}  # track key -> frozenset of fence indices
+
+    def __len__(self):
+        return len(self.fences)
+
+    def check(self, item, lat, lon):
+        """[(fence, "enter" | "exit")] for a new fix of track `item`."""
+        if not self.fences or lat != lat or lon != lon:
+            return []
+        candidates = self.grid.cells.get(self.grid.key(lat, lon), ())
+        now = frozenset(i for i in candidates if self.fences[i].contains(lat, lon))
+        before = self.inside.get(item, frozenset())
+        if now == before:
+            return []
+        if now:
+            self.inside[item] = now
+        else:
+            self.inside.pop(item, None)
+        return ([(self.fences[i], "enter") for i in sorted(now - before)]
+                + [(self.fences[i], "exit") for i in sorted(before - now)])
+
+    def forget(self, item):
+        self.inside.pop(item, None)
+
+    def members(self):
+        """{fence name: [track keys inside]}"""
+        out = {fence.name: [] for fence in self.fences}
+        for item, indices in self.inside.items():
+            for i in indices:
+                out[self.fences[i].name].append(item)
+        return out
+
+
+def load_geofences(path):
+    """Geofences of a JSON file (see the module docstring); raises ValueError if malformed."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"{path}: {e}") from None
+    fences = []
+    for entry in config.get("fences", []):
+        if not isinstance(entry, dict) or "name" not in entry:
+            raise ValueError(f"{path}: every fence needs a \"name\"")
+        try:
+            fences.append(Geofence(entry["name"], entry.get("polygon"), entry.get("center"), entry.get("radius")))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{path}: {e}") from None
+    return Geofences(fences)
@@ -0,0 +1,4 @@
+"""
+Stand-in for the XPPython3 package, so the plugins can be benchmarked
+without X-Plane. Only `xp` is provided; see benchmarks/XPPython3/xp.py.
+"""
@@ -0,0 +1,223 @@
+"""
+Simulated XPPython3 `xp` module for the benchmarks.
+
+Implements the part of the API the plugins use, with the same call
+signatures: dataref lookup and typed reads, flight loop and draw
+callbacks, menus, logging and dataref accessors. Every dataref exists;
+values are synthetic functions of the simulated clock (an aircraft
+circling at 47N 8E, sine waves for everything else). Paths ending in "_"
+(e.g. sim/flightmodel/engine/ENGN_N1_) are float arrays of ARRAY_SIZE.
+
+Nothing runs on its own: `sim.run(frames, fps)` advances the sim clock
+frame by frame, calls the flight loops that are due and the draw
+callbacks, and records how long every callback took (`sim.timings`).
+"""
+
+import math
+import sys
+import time
+import zlib
+
+Type_Unknown = 0
+Type_Int = 1
+Type_Float = 2
+Type_Double = 4
+Type_FloatArray = 8
+Type_IntArray = 16
+Type_Data = 32
+
+Phase_Window = 50
+Font_Proportional = 18
+
+ARRAY_SIZE = 8
+
+pythonExecutable = sys.executable
+
+
+class DataRef:
+    __slots__ = ("path", "types", "phase")
+
+    def __init__(self, path):
+        self.path = path
+        self.types = Type_FloatArray if path.endswith("_") else Type_Float | Type_Double
+        self.phase = zlib.crc32(path.encode("utf-8")) % 628 / 100.0
+
+
+class Sim:
+    """Driven sim clock and callback dispatcher."""
+
+    def __init__(self):
+        self.time = 0.0
+        self.frame = 0
+        self.flightLoops = {}  # callback -> [refCon, next frame or time, interval, last call time]
+        self.drawCallbacks = {}
+        self.accessors = {}
+        self.menus = []
+        self.messages = []
+        self.echo = False
+        self.timings = {}  # callback name -> list of ns per call
+
+    def reset(self):
+        self.__init__()
+
+    def timed(self, name, callback, *args):
+        start = time.perf_counter_ns()
+        result = callback(*args)
+        self.timings.setdefault(name, []).append(time.perf_counter_ns() - start)
+        return result
+
+    def run(self, frames, fps=60.0):
+        """Advance `frames` frames of 1/fps simulated seconds each."""
+        dt = 1.0 / fps
+        for _ in range(frames):
+            self.frame += 1
+            self.time += dt
+            for callback, state in list(self.flightLoops.items()):
+                refCon, due, interval, last = state
+                if interval == 0 or (interval < 0 and self.frame < due) or (interval > 0 and self.time < due):
+                    continue
+                result = self.timed(_name(callback), callback, self.time - last, dt, self.frame, refCon)
+                if callback not in self.flightLoops:
+                    continue  # unregistered itself
+                self._schedule(state, result or 0)
+                state[3] = self.time
+            for callback, (phase, after, refCon) in list(self.drawCallbacks.items()):
+                self.timed(_name(callback), callback, phase, after, refCon)
+
+    def _schedule(self, state, interval):
+        state[2] = interval
+        if interval < 0:
+            state[1] = self.frame - int(interval)
+        elif interval > 0:
+            state[1] = self.time + interval
+
+
+def _name(callback):
+    return getattr(callback, "__qualname__", repr(callback))
+
+
+sim = Sim()
+
+
+# ---------------- datarefs ----------------
+def findDataRef(path):
+    return DataRef(path)
+
+
+def getDataRefTypes(ref):
+    return ref.types
+
+
+def _value(ref):
+    t = sim.time
+    path = ref.path
+    if path.startswith("sim/time/"):
+        return t
+    if path.endswith("/latitude"):
+        return 47.0 + 0.05 * math.sin(t / 120.0)
+    if path.endswith("/longitude"):
+        return 8.0 + 0.05 * math.cos(t / 120.0)
+    if path.endswith("/elevation"):
+        return 1500.0 + 50.0 * math.sin(t / 30.0)
+    if path.endswith("psi"):
+        return (90.0 - math.degrees(t / 120.0)) % 360.0
+    if path.endswith("/groundspeed"):
+        return 0.05 * 111195.0 / 120.0  # m/s around the circle
+    if path.endswith("position/R"):
+        return -math.degrees(1.0 / 120.0)  # deg/s
+    return 100.0 * math.sin(t + ref.phase)
+
+
+def getDataf(ref):
+    return _value(ref)
+
+
+getDatad = getDataf
+
+
+def getDatai(ref):
+    return int(_value(ref))
+
+
+def getDatavf(ref, values=None, offset=0, count=-1):
+    if values is None:
+        return ARRAY_SIZE
+    n = ARRAY_SIZE - offset if count < 0 else min(count, ARRAY_SIZE - offset)
+    base = _value(ref)
+    for i in range(n):
+        values[i] = base + offset + i
+    return n
+
+
+def getDatavi(ref, values=None, offset=0, count=-1):
+    n = getDatavf(ref, values, offset, count)
+    if values is not None:
+        for i in range(n):
+            values[i] = int(values[i])
+    return n
+
+
+def registerDataAccessor(name, dataType=Type_Unknown, writable=-1, **callbacks):
+    sim.accessors[name] = callbacks
+    return name
+
+
+def unregisterDataAccessor(accessor):
+    sim.accessors.pop(accessor, None)
+
+
+# ---------------- callbacks ----------------
+def registerFlightLoopCallback(callback, interval, refCon=None):
+    state = [refCon, 0, interval, sim.time]
+    sim._schedule(state, interval)
+    sim.flightLoops[callback] = state
+
+
+def unregisterFlightLoopCallback(callback, refCon=None):
+    sim.flightLoops.pop(callback, None)
+
+
+def registerDrawCallback(callback, phase=Phase_Window, after=1, refCon=None):
+    sim.drawCallbacks[callback] = (phase, after, refCon)
+    return 1
+
+
+def unregisterDrawCallback(callback, phase=Phase_Window, after=1, refCon=None):
+    sim.drawCallbacks.pop(callback, None)
+    return 1
+
+
+# ---------------- UI ----------------
+def findPluginsMenu():
+    return 0
+
+
+def createMenu(name=None, parentMenuID=None, parentItem=0, handler=None, refCon=None):
+    sim.menus.append([name, handler, refCon, []])
+    return len(sim.menus)
+
+
+def appendMenuItem(menuID=None, name="", refCon=None):
+    if not menuID:
+        return 0
+    items = sim.menus[menuID - 1][3]
+    items.append(name)
+    return len(items) - 1
+
+
+def setMenuItemName(menuID, index, name):
+    sim.menus[menuID - 1][3][index] = name
+
+
+def getScreenSize():
+    return 1920, 1080
+
+
+def drawString(rgb=(1.0, 1.0, 1.0), x=0, y=0, value="", wordWrapWidth=None, fontID=Font_Proportional):
+    pass
+
+
+def log(message):
+    sim.messages.append(message)
+    if sim.echo:
+        print(message)
@@ -0,0 +1,132 @@
+"""
+FlightPlot benchmarks: the plugin's flight loop driven by the simulated
+sim, and the plot window's UpdatePlot under an offscreen Qt platform.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+from XPPython3 import xp
+
+from timing import summarize
+
+
+def write_config(folder, channels, rate):
+    """flightplot.json with `channels` synthetic scalar channels sampled at `rate` Hz."""
+    path = os.path.join(folder, "flightplot.json")
+    config = {
+        "groups": {"bench": rate},
+        "parameters": {f"CH{i}": {"dataref": f"bench/channel/{i}", "group": "bench"}
+                       for i in range(channels)},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f)
+    return path
+
+
+def bench_flight_loop(frames=6000, fps=60.0, channels=12, rate=0.0, record=True):
+    """PythonInterface.FlightLoopCallback (and DrawCallback) over `frames` simulated frames."""
+    import PI_FlightPlot
+
+    xp.sim.reset()
+    with tempfile.TemporaryDirectory() as folder:
+        plugin = PI_FlightPlot.PythonInterface()
+        plugin.configFile = write_config(folder, channels, rate)
+        plugin.recordDir = os.path.join(folder, "recordings") if record else None
+        plugin.statsServer = None
+        plugin.statsLogInterval = None
+        plugin.viewerMode = "thread"
+
+        # A draining thread stands in for the plot window, so the flight
+        # loop shares the GIL with a consumer as it does in the sim.
+        stop = threading.Event()
+
+        def drain():
+            while not stop.is_set():
+                if not len(plugin.ring.Read(plugin.maxDrain)):
+                    time.sleep(0.001)
+
+        plugin.LaunchUI = drain
+        plugin.XPluginStart()
+        plugin.MenuHandler(None, None)
+
+        start = time.perf_counter()
+        xp.sim.run(frames, fps)
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        plugin.qtThread.join()
+        written, dropped = plugin.ring.Written(), plugin.ring.Overflow()
+        recorder = plugin.recorder
+        plugin.MenuHandler(None, None)
+        plugin.XPluginStop()
+
+    # realtime_x: simulated seconds per wall second, the whole frame loop included
+    timings = xp.sim.timings
+    settings = {"fps": fps, "channels": channels, "rate_hz": rate or "frame", "record": record}
+    return [
+        summarize("FlightLoopCallback", timings.get("PythonInterface.FlightLoopCallback", []),
+                  rows=written, dropped=dropped,
+                  recorded=recorder.rows if recorder is not None else 0,
+                  realtime_x=round(frames / fps / elapsed, 1), **settings),
+        summarize("DrawCallback", timings.get("PythonInterface.DrawCallback", [])),
+    ]
+
+
+def bench_update_plot(ticks=300, channels=12, rate=100.0):
+    """PlotterWindow.UpdatePlot and the repaint after it, with a full 14,400-sample buffer."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5 import QtWidgets
+    from flightplot.transport import SampleRing
+    from flightplot.window import PlotterWindow
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    ring = SampleRing.Create(1 + channels, 16000)
+    ring.WriteLayout([f"CH{i}" for i in range(channels)])
+    window = PlotterWindow(ring, notifyStop=lambda: None)
+    window.timer.stop()
+    window.resize(1280, 720)
+    window.show()
+
+    t = 0.0
+    dt = 1.0 / rate
+    row = [0.0] * channels
+
+    def feed(n):
+        nonlocal t
+        for _ in range(n):
+            t += dt
+            for i in range(channels):
+                row[i] = 100.0 * ((t * (i + 1)) % 1.0)
+            ring.Write(t, row)
+
+    # Fill the plot buffer first, so every measured tick is the steady
+    # state of a long session
+    while len(window.buffer) < window.maxlen:
+        feed(window.maxDrain)
+        window.UpdatePlot()
+        app.processEvents()
+
+    perTick = max(int(rate * window.timer.interval() / 1000.0), 1)
+    update, paint = [], []
+    for _ in range(ticks):
+        feed(perTick)
+        start = time.perf_counter_ns()
+        window.UpdatePlot()
+        middle = time.perf_counter_ns()
+        app.processEvents()
+        end = time.perf_counter_ns()
+        update.append(middle - start)
+        paint.append(end - middle)
+
+    window.close()
+    app.processEvents()
+    ring.Close()
+    settings = {"channels": channels, "rate_hz": rate, "rows_per_tick": perTick}
+    return [
+        summarize("UpdatePlot", update, unit="ticks", **settings),
+        summarize("UpdatePlot repaint", paint, unit="ticks"),
+    ]
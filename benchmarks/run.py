@@ -0,0 +1,119 @@
+"""
+Headless benchmarks for the FlightPlot and TrajPlot plugins and the
+TrajPlot server, run against the simulated `xp` module in this folder.
+
+    python benchmarks/run.py                      # everything
+    python benchmarks/run.py flightloop --fps 90 --channels 32 --rate 50
+    python benchmarks/run.py --json bench.jsonl   # also append the results
+
+Every benchmark reports latency percentiles per call and a throughput;
+--json appends one line per run (with the git commit) so numbers can be
+tracked over time. updateplot needs PyQt5 and pyqtgraph.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+# The stand-in XPPython3 package sits next to this file and wins over any other
+sys.path[:0] = [HERE, ROOT, os.path.join(ROOT, "FlightPlot"), os.path.join(ROOT, "TrajPlot")]
+
+from timing import format_result  # noqa: E402
+
+BENCHMARKS = ("flightloop", "updateplot", "encode", "send", "ingest", "spatial", "data", "static")
+
+
+def run(name, args):
+    if name == "flightloop":
+        from flightplot_bench import bench_flight_loop
+        return bench_flight_loop(args.frames, args.fps, args.channels, args.rate, not args.no_record)
+    if name == "updateplot":
+        from flightplot_bench import bench_update_plot
+        return bench_update_plot(args.ticks, args.channels, args.plot_rate)
+    if name == "encode":
+        from trajplot_bench import bench_encode
+        return bench_encode()
+    if name == "send":
+        from trajplot_bench import bench_send
+        return bench_send(args.sends)
+    if name == "ingest":
+        from trajplot_bench import bench_ingest
+        return bench_ingest(args.packets, args.aircraft)
+    if name == "spatial":
+        from trajplot_bench import bench_spatial
+        return bench_spatial(args.packets, args.tracks, args.fences)
+    if name == "data":
+        from trajplot_bench import bench_data
+        return bench_data(args.requests, args.aircraft)
+    if name == "static":
+        from trajplot_bench import bench_static
+        return bench_static(args.requests)
+    raise ValueError(name)
+
+
+def commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="XPPython plugin benchmarks")
+    parser.add_argument("benchmarks", nargs="*", metavar="BENCHMARK",
+                        help=f"any of {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument("--fps", type=float, default=60.0, help="simulated frame rate (flightloop)")
+    parser.add_argument("--frames", type=int, default=6000, help="simulated frames (flightloop)")
+    parser.add_argument("--channels", type=int, default=12, help="plotted channels (flightloop, updateplot)")
+    parser.add_argument("--rate", type=float, default=0.0, help="sample rate in Hz, 0 = every frame (flightloop)")
+    parser.add_argument("--no-record", action="store_true", help="flightloop without the recorder")
+    parser.add_argument("--ticks", type=int, default=300, help="plot refreshes (updateplot)")
+    parser.add_argument("--plot-rate", type=float, default=100.0, help="rows per second fed to the window (updateplot)")
+    parser.add_argument("--sends", type=int, default=5000, help="flight loop calls (send)")
+    parser.add_argument("--packets", type=int, default=50000, help="datagrams (ingest)")
+    parser.add_argument("--aircraft", type=int, default=50, help="aircraft in the fleet (ingest, data)")
+    parser.add_argument("--tracks", type=int, default=500, help="aircraft spread over the map (spatial)")
+    parser.add_argument("--fences", type=int, default=50, help="geofences (spatial)")
+    parser.add_argument("--requests", type=int, default=1000, help="HTTP requests per server mode (data, static)")
+    parser.add_argument("--json", metavar="FILE", help="append the results to this JSON lines file")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark {unknown[0]!r}")
+
+    results = []
+    for name in args.benchmarks or BENCHMARKS:
+        try:
+            batch = run(name, args)
+        except ImportError as e:
+            print(f"{name}: skipped ({e})")
+            continue
+        for result in batch:
+            result["benchmark"] = name
+            print(format_result(result))
+        results += batch
+
+    if args.json:
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+            "results": results,
+        }
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
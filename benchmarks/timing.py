@@ -0,0 +1,67 @@
+"""
+Latency and throughput summaries for the benchmarks.
+"""
+
+import time
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def summarize(name, samples_ns, seconds=None, unit="calls", **extra):
+    """
+    Result dict for one benchmark: latency percentiles of the per-call
+    samples (ns) and throughput in `unit`/s. Throughput is over `seconds`
+    of wall time if given, otherwise over the summed call time, i.e. the
+    rate one core could sustain doing nothing else.
+    """
+    ordered = sorted(samples_ns)
+    total = sum(ordered)
+    seconds = total / 1e9 if seconds is None else seconds
+    result = {
+        "name": name,
+        "calls": len(ordered),
+        "mean_us": round(total / len(ordered) / 1e3, 2) if ordered else 0.0,
+        "p50_us": round(percentile(ordered, 0.50) / 1e3, 2),
+        "p99_us": round(percentile(ordered, 0.99) / 1e3, 2),
+        "max_us": round(ordered[-1] / 1e3, 2) if ordered else 0.0,
+        "throughput": round(len(ordered) / seconds, 1) if seconds else 0.0,
+        "unit": f"{unit}/s",
+    }
+    result.update(extra)
+    return result
+
+
+def batch(name, count, func, unit="ops", **extra):
+    """Time `func` called `count` times in a tight loop; only the mean is measured."""
+    start = time.perf_counter_ns()
+    for _ in range(count):
+        func()
+    elapsed = time.perf_counter_ns() - start
+    mean = elapsed / count / 1e3
+    result = {
+        "name": name,
+        "calls": count,
+        "mean_us": round(mean, 3),
+        "throughput": round(count / (elapsed / 1e9), 1),
+        "unit": f"{unit}/s",
+    }
+    result.update(extra)
+    return result
+
+
+def format_result(result):
+    line = f"{result['name']:<28} {result['calls']:>8} calls  mean {result['mean_us']:>9.2f}us"
+    if "p50_us" in result:
+        line += f"  p50 {result['p50_us']:>9.2f}us  p99 {result['p99_us']:>9.2f}us  max {result['max_us']:>9.2f}us"
+    line += f"  {result['throughput']:>12,.0f} {result['unit']}"
+    details = [f"{k}={v}" for k, v in result.items()
+               if k not in ("name", "benchmark", "calls", "mean_us", "p50_us", "p99_us", "max_us",
+                             "throughput", "unit")]
+    if details:
+        line += "  (" + ", ".join(details) + ")"
+    return line
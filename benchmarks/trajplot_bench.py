@@ -0,0 +1,245 @@
+"""
+TrajPlot benchmarks: packet encode and send in the plugin, Fleet ingest and
+/data and index.html serving in both server modes, spatial queries and
+geofence checks.
+"""
+
+import asyncio
+import http.client
+import math
+import os
+import socket
+import socketserver
+import threading
+import time
+
+from XPPython3 import xp
+
+from timing import batch, summarize
+
+TRAJPLOT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "TrajPlot")
+
+
+def bench_encode(count=200000):
+    from trajplot import protocol
+
+    buf = bytearray(protocol.RECORD.size)
+    return [batch("protocol.pack_into", count,
+                  lambda: protocol.pack_into(buf, 0, protocol.FLAG_ON, 0, 1, 12.5, 47.0, 8.0, 1500.0, 90.0),
+                  unit="records")]
+
+
+def bench_send(count=5000):
+    """PythonInterface.flightLoopCB: dataref reads, encode and sendto a local socket."""
+    import PI_TrajPlot
+
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(0.2)
+    received = 0
+    done = threading.Event()
+
+    def receive():
+        nonlocal received
+        while True:
+            try:
+                receiver.recv(65535)
+                received += 1
+            except socket.timeout:
+                if done.is_set():
+                    return
+
+    thread = threading.Thread(target=receive, daemon=True)
+    thread.start()
+
+    xp.sim.reset()
+    plugin = PI_TrajPlot.PythonInterface()
+    plugin.server = receiver.getsockname()
+    plugin.statsInterval = None
+    plugin.statsLogInterval = None
+    plugin.XPluginStart()
+    plugin.menuHandler(None, None)
+    # The circling aircraft is slow enough for 1 s intervals, so one frame
+    # per second calls the callback every frame
+    xp.sim.run(count, fps=1.0)
+    plugin.menuHandler(None, None)
+    plugin.XPluginStop()
+    done.set()
+    thread.join()
+    receiver.close()
+
+    timings = xp.sim.timings.get("PythonInterface.flightLoopCB", [])
+    counters = plugin.profiler.counters
+    return [summarize("flightLoopCB", timings, received=received, suppressed=counters["suppressed"],
+                      send_errors=counters["send_errors"])]
+
+
+def make_packets(count, aircraft, spread=0.0):
+    """
+    `count` single-record datagrams from `aircraft` sources moving in
+    circles, with their addresses. The circles' centres are scattered over
+    `spread` degrees around 47N 8E.
+    """
+    from trajplot import protocol
+
+    side = math.ceil(math.sqrt(aircraft))
+    packets = []
+    for i in range(count):
+        source = i % aircraft
+        t = i // aircraft
+        lat = 47.0 + spread * ((source // side) / side - 0.5)
+        lon = 8.0 + spread * ((source % side) / side - 0.5)
+        buf = bytearray(protocol.RECORD.size)
+        angle = t / 60.0 + source
+        protocol.pack_into(buf, 0, protocol.FLAG_ON, source, t + 1, float(t),
+                           lat + 0.05 * math.sin(angle), lon + 0.05 * math.cos(angle),
+                           1500.0 + source, math.degrees(angle) % 360.0)
+        packets.append((bytes(buf), ("127.0.0.1", 50000)))
+    return packets
+
+
+def bench_ingest(count=50000, aircraft=50):
+    from trajplot.fleet import Fleet
+
+    fleet = Fleet(history=3600, timeout=3600.0)
+    packets = make_packets(count, aircraft)
+    samples = []
+    for packet, addr in packets:
+        start = time.perf_counter_ns()
+        fleet.ingest_packet(packet, addr)
+        samples.append(time.perf_counter_ns() - start)
+    return [summarize("Fleet.ingest_packet", samples, unit="packets", aircraft=aircraft)]
+
+
+def bench_spatial(count=50000, aircraft=500, fences=50, queries=2000):
+    """
+    Fleet ingest with `fences` geofences over a 10-degree square of
+    `aircraft` tracks, and the /within and /near queries on the result.
+    """
+    from trajplot.fleet import Fleet
+    from trajplot.spatial import Geofence, Geofences
+
+    side = math.ceil(math.sqrt(fences))
+    rules = []
+    for i in range(fences):
+        lat = 42.0 + 10.0 * (i // side + 0.5) / side
+        lon = 3.0 + 10.0 * (i % side + 0.5) / side
+        if i % 2:
+            rules.append(Geofence(f"circle {i}", center=(lat, lon), radius=20000.0))
+        else:
+            rules.append(Geofence(f"box {i}", polygon=[(lat - 0.2, lon - 0.3), (lat + 0.2, lon - 0.3),
+                                                        (lat + 0.2, lon + 0.3), (lat - 0.2, lon + 0.3)]))
+    fleet = Fleet(history=3600, timeout=3600.0, geofences=Geofences(rules))
+    samples = []
+    for packet, addr in make_packets(count, aircraft, spread=10.0):
+        start = time.perf_counter_ns()
+        fleet.ingest_packet(packet, addr)
+        samples.append(time.perf_counter_ns() - start)
+
+    within, near = [], []
+    for i in range(queries):
+        lat = 43.0 + 8.0 * ((i * 37) % 100) / 100
+        lon = 4.0 + 8.0 * ((i * 61) % 100) / 100
+        start = time.perf_counter_ns()
+        fleet.within(lat - 0.5, lon - 0.75, lat + 0.5, lon + 0.75)
+        middle = time.perf_counter_ns()
+        fleet.near(lat, lon, 50000.0)
+        end = time.perf_counter_ns()
+        within.append(middle - start)
+        near.append(end - middle)
+    return [
+        summarize("Fleet.ingest_packet fenced", samples, unit="packets", aircraft=aircraft,
+                  fences=fences, alerts=fleet.alert_seq),
+        summarize("Fleet.within 1x1.5 deg", within, unit="queries", aircraft=aircraft),
+        summarize("Fleet.near 50 km", near, unit="queries", aircraft=aircraft),
+    ]
+
+
+def fetch(port, requests, path="/data", headers=None):
+    samples = []
+    size = 0
+    for _ in range(requests):
+        start = time.perf_counter_ns()
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        conn.request("GET", path, headers=headers or {})
+        response = conn.getresponse()
+        size = len(response.read())
+        conn.close()
+        samples.append(time.perf_counter_ns() - start)
+    return samples, size
+
+
+class QuietHandler:
+    """Mixin dropping the per-request access log line."""
+
+    def log_message(self, format, *args):
+        pass
+
+
+def bench_data(requests=1000, aircraft=50, modes=("threaded", "asyncio"), path="/data", headers=None,
+               label=None):
+    """GET round trips (connect, request, body) of `path` against each server mode."""
+    import server
+    from trajplot.aioserver import AsyncServer
+
+    from trajplot.fleet import Fleet
+
+    fleet = Fleet(history=3600, timeout=3600.0)
+    for packet, addr in make_packets(aircraft * 20, aircraft):
+        fleet.ingest_packet(packet, addr)
+    results = []
+
+    if "threaded" in modes:
+        server.fleet = fleet
+        handler = type("Handler", (QuietHandler, server.Handler), {})
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        socketserver.ThreadingTCPServer.daemon_threads = True
+        httpd = socketserver.ThreadingTCPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        start = time.perf_counter()
+        samples, size = fetch(httpd.server_address[1], requests, path, headers)
+        elapsed = time.perf_counter() - start
+        httpd.shutdown()
+        httpd.server_close()
+        results.append(summarize(f"{label or path} threaded", samples, seconds=elapsed, unit="requests",
+                                 aircraft=aircraft, bytes=size))
+
+    if "asyncio" in modes:
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        holder = {}
+
+        async def start_server():
+            app = AsyncServer(fleet, TRAJPLOT_DIR)
+            holder["server"] = await asyncio.start_server(app.handle, "127.0.0.1", 0)
+            ready.set()
+
+        def run_loop():
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(start_server())
+            loop.run_forever()
+
+        thread = threading.Thread(target=run_loop, daemon=True)
+        thread.start()
+        ready.wait()
+        port = holder["server"].sockets[0].getsockname()[1]
+        start = time.perf_counter()
+        samples, size = fetch(port, requests, path, headers)
+        elapsed = time.perf_counter() - start
+        holder["server"].close()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        fleet.on_change = None
+        results.append(summarize(f"{label or path} asyncio", samples, seconds=elapsed, unit="requests",
+                                 aircraft=aircraft, bytes=size))
+    return results
+
+
+def bench_static(requests=1000):
+    """GET / with gzip, and its revalidation answered 304, against each server mode."""
+    from trajplot.assets import AssetCache
+
+    etag = AssetCache(TRAJPLOT_DIR).get("/").gzip_etag
+    gzip = {"Accept-Encoding": "gzip"}
+    return (bench_data(requests, 0, path="/", headers=gzip, label="/ gzip")
+            + bench_data(requests, 0, path="/", headers=dict(gzip, **{"If-None-Match": etag}), label="/ 304"))
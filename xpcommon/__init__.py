@@ -0,0 +1,16 @@
+"""
+Helpers shared by the FlightPlot and TrajPlot plugins.
+Copy this folder into Resources/plugins/PythonPlugins next to the PI_*.py files.
+
+xpcommon.export and xpcommon.profiler use only the standard library and
+also work outside X-Plane (the TrajPlot server, the plot viewer);
+DataRefSampler and StatsDataRef need XPPython3 and are imported on first
+use.
+"""
+
+
+def __getattr__(name):
+    if name in ("DataRefSampler", "StatsDataRef"):
+        from . import datarefs
+        return getattr(datarefs, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
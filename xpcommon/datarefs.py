@@ -0,0 +1,132 @@
+"""
+Batched, typed dataref reads into a preallocated record, and a dataref
+that publishes profiler stats.
+"""
+
+import re
+from XPPython3 import xp  # type: ignore
+
+_SPEC = re.compile(r"^(?P<path>[^\[\]]+)(\[(?P<start>\d+)(:(?P<stop>\d+))?\])?$")
+
+NaN = float("nan")
+
+
+class DataRefSampler:
+    """
+    Reads a fixed set of datarefs into one flat record (a list of floats).
+
+    `specs` is a list of (name, dataref) pairs. A dataref may carry an index,
+    "path[2]", or a slice, "path[0:4]"; a bare array dataref is read whole.
+    Array reads expand to one column per element, named "name[i]".
+
+    resolve() looks every dataref up once and picks the getter that matches
+    its type, so sample() is a plain loop over prepared (slot, getter, ref)
+    entries. Arrays are read with the vector getters into a reused buffer.
+    Datarefs that cannot be found stay NaN.
+    """
+
+    def __init__(self, specs):
+        self.specs = list(specs)
+        self.columns = []
+        self.record = []
+        self.offset = 0
+        self._layout = []
+        self._scalars = []
+        self._vectors = []
+
+    def resolve(self):
+        self.columns = []
+        self._layout = []
+        for name, spec in self.specs:
+            m = _SPEC.match(spec.strip())
+            path = m.group("path") if m else spec
+            ref = xp.findDataRef(path)
+            if ref is None:
+                xp.log(f"[DataRefSampler] dataref not found: {path}")
+                self._layout.append((len(self.columns), None, None, 0, 0))
+                self.columns.append(name)
+                continue
+
+            types = xp.getDataRefTypes(ref)
+            if types & (xp.Type_FloatArray | xp.Type_IntArray):
+                vector = xp.getDatavf if types & xp.Type_FloatArray else xp.getDatavi
+                if m and m.group("start") is not None:
+                    start = int(m.group("start"))
+                    stop = int(m.group("stop")) if m.group("stop") else start + 1
+                else:
+                    start, stop = 0, vector(ref)
+                count = stop - start
+                slot = len(self.columns)
+                if m and m.group("start") is not None and m.group("stop") is None:
+                    self.columns.append(name)
+                else:
+                    self.columns += [f"{name}[{i}]" for i in range(start, stop)]
+                self._layout.append((slot, vector, ref, start, count))
+            else:
+                if types & xp.Type_Double:
+                    getter = xp.getDatad
+                elif types & xp.Type_Float:
+                    getter = xp.getDataf
+                else:
+                    getter = xp.getDatai
+                self._layout.append((len(self.columns), getter, ref, 0, 0))
+                self.columns.append(name)
+
+        self.bind([NaN] * len(self.columns), 0)
+        return self
+
+    def bind(self, record, offset):
+        """Write into `record` starting at `offset` (e.g. a record shared by several samplers)."""
+        self.record = record
+        self.offset = offset
+        self._scalars = []
+        self._vectors = []
+        for slot, getter, ref, start, count in self._layout:
+            if getter is None:
+                continue
+            if count:
+                self._vectors.append((offset + slot, getter, ref, [0.0] * count, start, count))
+            else:
+                self._scalars.append((offset + slot, getter, ref))
+
+    def sample(self):
+        rec = self.record
+        for slot, getter, ref in self._scalars:
+            rec[slot] = getter(ref)
+        for slot, getter, ref, buf, start, count in self._vectors:
+            getter(ref, buf, start, count)
+            rec[slot:slot + count] = buf
+        return rec
+
+
+class StatsDataRef:
+    """
+    Read-only float array dataref publishing a Profiler's values(), so the
+    stats can be watched in DataRefTool or read by other plugins. The name
+    of every element is logged once by register().
+    """
+
+    def __init__(self, name, profiler):
+        self.name = name
+        self.profiler = profiler
+        self.ref = None
+
+    def register(self):
+        self.ref = xp.registerDataAccessor(self.name, dataType=xp.Type_FloatArray, writable=0,
+                                           readFloatArray=self._read)
+        fields = ", ".join(f"[{i}] {f}" for i, f in enumerate(self.profiler.fields()))
+        xp.log(f"[{self.profiler.name}] stats dataref {self.name}: {fields}")
+        return self
+
+    def _read(self, refCon, values, offset, count):
+        data = self.profiler.values()
+        if values is None:
+            return len(data)
+        data = data[offset:offset + count]
+        values.extend(data)
+        return len(data)
+
+    def unregister(self):
+        if self.ref is not None:
+            xp.unregisterDataAccessor(self.ref)
+            self.ref = None
@@ -0,0 +1,146 @@
+"""
+Chunked export of time-aligned float columns to CSV or a compressed
+columnar archive. Standard library only, so the TrajPlot server can use it
+outside X-Plane as well.
+
+Data is passed as an iterable of chunks; each chunk is a list holding one
+sequence of floats per column (array('d'), a NumPy array or a list), all of
+the same length. Only one chunk is held in memory at a time.
+
+The columnar format (".colz") is a ZIP archive with one deflated member per
+column and chunk, "<chunk>/<column>.f64" (raw float64 in the manifest's
+byte order), plus "manifest.json" listing the columns and the rows of every
+chunk. Each member loads directly, e.g. numpy.frombuffer(zip.read(name)).
+"""
+
+import csv
+import io
+import json
+import os
+import sys
+import zipfile
+from array import array
+
+FORMATS = ("csv", "colz")
+CHUNK_ROWS = 65536
+
+
+def format_for(path):
+    """Export format implied by a file name, "csv" unless it ends in .colz."""
+    return "colz" if os.path.splitext(path)[1].lower() == ".colz" else "csv"
+
+
+def chunked(columns, rows=CHUNK_ROWS):
+    """Chunks of at most `rows` rows cut from whole columns."""
+    n = len(columns[0]) if columns else 0
+    for start in range(0, n, rows):
+        yield [c[start:start + rows] for c in columns]
+
+
+def _float64(values):
+    view = memoryview(values)
+    if view.format == "d" and view.ndim == 1:
+        return view.tobytes()
+    return array("d", values).tobytes()
+
+
+class _Pipe:
+    """Write-only, unseekable sink that hands on what was written so far."""
+
+    def __init__(self):
+        self.parts = []
+        self.offset = 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def iter_csv(columns, chunks):
+    """CSV bytes, one piece per chunk, header row first."""
+    text = io.StringIO()
+    writer = csv.writer(text, lineterminator="\n")
+    writer.writerow(columns)
+    for chunk in chunks:
+        # tolist() turns NumPy and array('d') columns into plain floats at C speed
+        writer.writerows(zip(*(c.tolist() if hasattr(c, "tolist") else c for c in chunk)))
+        yield text.getvalue().encode("utf-8")
+        text.seek(0)
+        text.truncate()
+    if text.tell():
+        yield text.getvalue().encode("utf-8")
+
+
+def iter_colz(columns, chunks, level=6):
+    """Columnar ZIP archive bytes, one piece per chunk."""
+    pipe = _Pipe()
+    rows = []
+    with zipfile.ZipFile(pipe, "w", zipfile.ZIP_DEFLATED, compresslevel=level) as archive:
+        for i, chunk in enumerate(chunks):
+            for j, values in enumerate(chunk):
+                archive.writestr(f"{i:05d}/{j}.f64", _float64(values))
+            rows.append(len(chunk[0]) if chunk else 0)
+            yield pipe.take()
+        manifest = {
+            "format": "xpcommon-colz",
+            "version": 1,
+            "byteorder": sys.byteorder,
+            "columns": list(columns),
+            "chunks": rows,
+        }
+        archive.writestr("manifest.json", json.dumps(manifest, indent=1))
+    yield pipe.take()
+
+
+def iter_export(fmt, columns, chunks):
+    if fmt == "csv":
+        return iter_csv(columns, chunks)
+    if fmt == "colz":
+        return iter_colz(columns, chunks)
+    raise ValueError(f"unknown export format {fmt!r}")
+
+
+def export(path, columns, chunks, fmt=None):
+    """Write the chunks to `path`; returns the number of rows written."""
+    fmt = fmt or format_for(path)
+    rows = 0
+
+    def counted():
+        nonlocal rows
+        for chunk in chunks:
+            rows += len(chunk[0]) if chunk else 0
+            yield chunk
+
+    with open(path, "wb") as f:
+        for data in iter_export(fmt, columns, counted()):
+            f.write(data)
+    return rows
+
+
+def read_colz(path):
+    """(columns, chunks) of a whole .colz file, each chunk a list of array('d') columns."""
+    with zipfile.ZipFile(path) as archive:
+        manifest = json.loads(archive.read("manifest.json"))
+        columns = manifest["columns"]
+        chunks = []
+        for i, _ in enumerate(manifest["chunks"]):
+            chunk = []
+            for j in range(len(columns)):
+                values = array("d", archive.read(f"{i:05d}/{j}.f64"))
+                if manifest["byteorder"] != sys.byteorder:
+                    values.byteswap()
+                chunk.append(values)
+            chunks.append(chunk)
+    return columns, chunks
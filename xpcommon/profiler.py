@@ -0,0 +1,200 @@
+"""
+Low-overhead timing probes and counters for plugin callbacks. Standard
+library only, so the plot viewer and the TrajPlot server use it as well.
+
+    profiler = Profiler("FlightPlot")
+    probe = profiler.probe("FlightLoopCallback", budget_us=1000)
+    ...
+    with probe:
+        ...                      # timed body
+    profiler.count("send_errors")
+    profiler.gauge("ring_depth", ring.Depth())
+    xp.log(profiler.line())
+
+A probe costs two perf_counter_ns() calls and one list increment per call:
+durations go into log2 buckets (bucket k counts durations below 2**k µs),
+so percentiles are reported as the upper bound of their bucket, i.e. at
+most a factor of two high, never low. Histograms are rolling: they cover
+the current and the previous `window` seconds.
+"""
+
+import json
+import time
+
+BUCKETS = 32  # the last bucket also takes everything above ~35 minutes
+
+# Stats datagrams share the TrajPlot UDP port with position packets; the
+# prefix keeps them apart from both binary records and legacy JSON.
+STATS_MAGIC = b"TPSTATS "
+
+
+class Probe:
+    """
+    Rolling log2 histogram of one code path's durations. Use it as a
+    context manager around the timed code (not re-entrant), or pass
+    nanoseconds to add().
+    """
+
+    __slots__ = ("name", "window_ns", "budget_us", "current", "previous",
+                 "peak", "previous_peak", "over", "previous_over", "rotate_at", "start", "last")
+
+    def __init__(self, name, window=10.0, budget_us=None):
+        self.name = name
+        self.window_ns = int(window * 1e9)
+        self.budget_us = budget_us
+        self.current = [0] * BUCKETS
+        self.previous = [0] * BUCKETS
+        self.peak = self.previous_peak = 0
+        self.over = self.previous_over = 0
+        self.rotate_at = time.perf_counter_ns() + self.window_ns
+        self.start = 0
+        self.last = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self.add(end - self.start, end)
+        return False
+
+    def add(self, ns, now=None):
+        now = time.perf_counter_ns() if now is None else now
+        if now >= self.rotate_at:
+            self.rotate(now)
+        us = ns // 1000
+        self.last = us
+        self.current[min(us.bit_length(), BUCKETS - 1)] += 1
+        if us > self.peak:
+            self.peak = us
+        if self.budget_us is not None and us > self.budget_us:
+            self.over += 1
+
+    def rotate(self, now=None):
+        now = time.perf_counter_ns() if now is None else now
+        if now - self.rotate_at >= self.window_ns:
+            # Idle for a whole window: nothing recent is left to show
+            self.previous = [0] * BUCKETS
+            self.previous_peak = self.previous_over = 0
+        else:
+            self.previous = self.current
+            self.previous_peak, self.previous_over = self.peak, self.over
+        self.current = [0] * BUCKETS
+        self.peak = self.over = 0
+        self.rotate_at = now + self.window_ns
+
+    def stats(self):
+        """
+        {"count", "p50_us", "p99_us", "max_us"[, "over_budget"]} over the
+        last one or two windows, and "last_us", the latest duration.
+        """
+        if time.perf_counter_ns() >= self.rotate_at:
+            self.rotate()
+        counts = [a + b for a, b in zip(self.current, self.previous)]
+        total = sum(counts)
+        peak = max(self.peak, self.previous_peak)
+        out = {"count": total,
+               "p50_us": self._percentile(counts, total, 0.50, peak),
+               "p99_us": self._percentile(counts, total, 0.99, peak),
+               "max_us": peak,
+               "last_us": self.last}
+        if self.budget_us is not None:
+            out["over_budget"] = self.over + self.previous_over
+        return out
+
+    @staticmethod
+    def _percentile(counts, total, q, peak):
+        if not total:
+            return 0
+        rank = q * total
+        seen = 0
+        for k, n in enumerate(counts):
+            seen += n
+            if seen >= rank:
+                return min(1 << k, peak) if k else 0
+        return peak
+
+
+class Profiler:
+    """
+    Named probes, counters and gauges of one component. Everything is
+    registered on first use; register it all up front (count(name, 0),
+    gauge(name, 0)) so the order of values() stays fixed. Snapshots taken
+    from another thread while probes are being written are approximate.
+    """
+
+    def __init__(self, name, window=10.0):
+        self.name = name
+        self.window = window
+        self.probes = {}
+        self.counters = {}
+        self.gauges = {}
+
+    def probe(self, name, budget_us=None):
+        probe = self.probes.get(name)
+        if probe is None:
+            probe = self.probes[name] = Probe(name, self.window, budget_us)
+        return probe
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name, value):
+        self.gauges[name] = value
+
+    def snapshot(self):
+        """JSON-ready view of every probe, counter and gauge."""
+        return {
+            "name": self.name,
+            "window": self.window,
+            "probes": {name: probe.stats() for name, probe in self.probes.items()},
+            "counters": dict(self.counters),
+            "gauges": dict(self.gauges),
+        }
+
+    def fields(self):
+        """Names of values(), e.g. "FlightLoopCallback.p99_us"."""
+        names = []
+        for name in self.probes:
+            names += [f"{name}.p50_us", f"{name}.p99_us", f"{name}.max_us"]
+        return names + list(self.counters) + list(self.gauges)
+
+    def values(self):
+        """Flat list of floats in the order of fields(), for a stats dataref."""
+        values = []
+        for probe in self.probes.values():
+            stats = probe.stats()
+            values += [stats["p50_us"], stats["p99_us"], stats["max_us"]]
+        return [float(v) for v in values + list(self.counters.values()) + list(self.gauges.values())]
+
+    def line(self):
+        """One-line summary for a log file."""
+        parts = []
+        for name, probe in self.probes.items():
+            s = probe.stats()
+            part = f"{name} p50<={s['p50_us']}us p99<={s['p99_us']}us max {s['max_us']}us n={s['count']}"
+            if "over_budget" in s:
+                part += f" over {probe.budget_us}us: {s['over_budget']}"
+            parts.append(part)
+        parts += [f"{name} {value}" for name, value in self.counters.items()]
+        parts += [f"{name} {value:g}" if isinstance(value, float) else f"{name} {value}"
+                  for name, value in self.gauges.items()]
+        return f"[{self.name}] " + ", ".join(parts)
+
+    def packet(self):
+        """The snapshot as a stats datagram for the TrajPlot server."""
+        return STATS_MAGIC + json.dumps(self.snapshot(), separators=(",", ":")).encode("utf-8")
+
+
+def parse_packet(packet):
+    """Snapshot dict of a stats datagram, or None if `packet` is not one."""
+    if not packet.startswith(STATS_MAGIC):
+        return None
+    try:
+        stats = json.loads(packet[len(STATS_MAGIC):])
+    except ValueError:
+        raise ValueError("malformed stats packet") from None
+    if not isinstance(stats, dict):
+        raise ValueError("malformed stats packet")
+    return stats